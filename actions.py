@@ -1,10 +1,10 @@
 from __future__ import annotations
 
 from typing import Optional,Tuple,TYPE_CHECKING
-import random
 
 import color
 import exceptions
+from game_events import AttackEvent
 import tile_types
 if TYPE_CHECKING:
     from engine import Engine
@@ -34,21 +34,16 @@ class PickupAction(Action):
         super().__init__(entity)
 
     def perform(self) -> None:
-        actor_location_x = self.entity.x
-        actor_location_y = self.entity.y
         inventory = self.entity.inventory
 
-        for item in self.engine.game_map.items:
-            if actor_location_x == item.x and actor_location_y == item.y:
-                if inventory.current_size > inventory.capacity:
-                    raise exceptions.Impossible("Your inventory is full")
-                self.engine.game_map.entities.remove(item)
-                item.parent = self.entity.inventory
+        for item in self.engine.game_map.items_at(self.entity.x, self.entity.y):
+            if inventory.current_size > inventory.capacity:
+                raise exceptions.Impossible("Your inventory is full")
+            self.engine.game_map.remove_entity(item)
+            inventory.add(item)
 
-                inventory.items.append(item)
-
-                self.engine.message_log.add_message(f"You picked up the {item.name}.")
-                return
+            self.engine.message_log.add_message(f"You picked up the {item.name}.")
+            return
         raise exceptions.Impossible("There is nothing here to pick up.")
 
 class ItemAction(Action):
@@ -83,7 +78,7 @@ class EquipAction(ItemAction):
 
 class WaitAction(Action):
     def perform(self)->None:
-        if random.random()<0.2: #regen rate
+        if self.engine.rng.stream("regen").random()<0.2: #regen rate
             self.entity.fighter.heal(1)
 
 class TakeDownStairsAction(Action):
@@ -134,49 +129,41 @@ class ActionWithDirection(Action):
 class MeleeAction(ActionWithDirection):
     def perform(self)->None:
         target = self.target_actor
-        if self.entity is self.engine.player:
-            attack_color = color.player_atk
-        else:
-            attack_color = color.enemy_atk
-
-        attack_desc = f"{self.entity.name.capitalize()} attacks {target.name}"
-
         if not target:
             raise exceptions.Impossible("Nothing to Attack")
 
+        by_player = self.entity is self.engine.player
+        dice = self.engine.rng.stream("combat")
+
         # TODO: Change this method, really don't like this, or maybe just needs balancing
-        if random.randint(1,20) + self.entity.fighter.strength_mod >= target.fighter.defense:
+        if dice.randint(1,20) + self.entity.fighter.strength_mod >= target.fighter.defense:
             damage_die = self.entity.fighter.damage_die_size
             die_number = self.entity.fighter.damage_die_number
             if self.entity.equipment.weapon:
                 damage_die = self.entity.equipment.weapon.equippable.damage_die_size
                 die_number = self.entity.equipment.weapon.equippable.damage_die_number
-            damage = 0
-            for i in range(die_number):
-                damage += random.randint(1,damage_die)
+            damage = dice.roll(die_number,damage_die)
 
             damage = damage + self.entity.fighter.damage_mod - target.fighter.resistance
 
+            self.engine.events.publish(AttackEvent(self.entity.name, target.name, by_player, damage))
             if damage > 0:
-                self.engine.message_log.add_message(f"{attack_desc} for {damage} hit points.",attack_color)
                 target.fighter.hp -= damage
-            else:
-                self.engine.message_log.add_message(f"{attack_desc} but does no damage",attack_color)
         else:
-            self.engine.message_log.add_message(f"{attack_desc} but misses.",attack_color)
+            self.engine.events.publish(AttackEvent(self.entity.name, target.name, by_player))
 
 class MovementAction(ActionWithDirection):
     def perform(self)->None:
         dest_x, dest_y = self.dest_xy
         if not self.engine.game_map.in_bounds(dest_x,dest_y):
             raise exceptions.Impossible("That way is blocked.")
-        if not self.engine.game_map.tiles["walkable"][dest_x,dest_y]:
+        if not self.engine.game_map.tiles.lookup("walkable",dest_x,dest_y):
             raise exceptions.Impossible("That way is blocked.")
         if self.engine.game_map.get_blocking_entity_at_location(dest_x,dest_y):
             raise exceptions.Impossible("That way is blocked.")
 
         self.entity.move(self.dx,self.dy)
-        if random.random()<0.05: #regen rate
+        if self.engine.rng.stream("regen").random()<0.05: #regen rate
             self.entity.fighter.heal(1)
 
 class BumpAction(ActionWithDirection):
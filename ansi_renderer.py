@@ -0,0 +1,83 @@
+"""Encode consoles as ANSI escape output for terminal clients.
+
+Only cells that changed since the client's previous frame are sent, and
+runs of neighbouring cells with the same colors are written as one string.
+"""
+from __future__ import annotations
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+import tcod
+
+# Ends every frame: reset the colors and park the cursor. Nothing else in a
+# frame matches it, so clients can tell when a whole frame has arrived.
+FRAME_END = "\x1b[0m\x1b[H"
+
+def console_cells(console: tcod.Console)->np.ndarray:
+    """Return a copy of a console's cells indexed [y, x], whichever order it uses."""
+    cells = console.tiles_rgb
+    if cells.shape != (console.height, console.width) or not cells.flags.c_contiguous:
+        cells = cells.T
+    return cells.copy()
+
+class AnsiRenderer:
+    """Tracks what one client's terminal shows and encodes updates to it."""
+
+    def __init__(self)->None:
+        # The last frame sent, indexed [y, x].
+        self.previous: Optional[np.ndarray] = None
+
+    def reset(self)->None:
+        """Forget the client's screen, so the next frame is sent in full."""
+        self.previous = None
+
+    def encode(self, console: tcod.Console)->bytes:
+        frame = console_cells(console)
+        previous = self.previous
+        self.previous = frame
+
+        if previous is None or previous.shape != frame.shape:
+            changed = np.ones(frame.shape, dtype = bool)
+            out: List[str] = ["\x1b[0m\x1b[2J"]
+        else:
+            changed = (
+                (frame["ch"] != previous["ch"])
+                | (frame["fg"] != previous["fg"]).any(axis = -1)
+                | (frame["bg"] != previous["bg"]).any(axis = -1)
+            )
+            out = []
+
+        ys, xs = np.nonzero(changed)
+        if not len(ys):
+            return b""
+        cells = frame[ys, xs]
+        colors = np.concatenate([cells["fg"], cells["bg"]], axis = -1)
+
+        # A new run starts wherever a cell is not directly right of the last one,
+        # or has different colors.
+        run_starts = np.ones(len(ys), dtype = bool)
+        run_starts[1:] = (
+            (ys[1:] != ys[:-1])
+            | (xs[1:] != xs[:-1] + 1)
+            | (colors[1:] != colors[:-1]).any(axis = -1)
+        )
+        starts = np.flatnonzero(run_starts).tolist()
+        ends = starts[1:] + [len(ys)]
+
+        chars = np.where(cells["ch"] >= 0x20, cells["ch"], ord(" ")).tolist()
+        cursor: Optional[Tuple[int,int]] = None
+        sgr: Optional[Tuple[int,...]] = None
+        for start, end in zip(starts, ends):
+            x = int(xs[start])
+            y = int(ys[start])
+            if cursor != (x, y):
+                out.append(f"\x1b[{y+1};{x+1}H")
+            run_colors = tuple(colors[start].tolist())
+            if run_colors != sgr:
+                out.append("\x1b[38;2;{};{};{};48;2;{};{};{}m".format(*run_colors))
+                sgr = run_colors
+            out.append("".join(map(chr, chars[start:end])))
+            cursor = (x + end - start, y)
+        out.append(FRAME_END)
+        return "".join(out).encode("utf-8")
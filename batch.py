@@ -0,0 +1,120 @@
+#! /usr/bin/env python3
+"""Play many seeded headless games in parallel and report on the results.
+Used to balance entity_factories and the procgen spawn tables.
+"""
+from __future__ import annotations
+
+import argparse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import gc
+import json
+import multiprocessing
+import os
+import statistics
+from typing import Dict, IO, Iterator, List, Optional
+
+from headless import run_headless
+
+
+def play_game(seed: int, max_turns: int, max_floor: Optional[int])->Dict:
+    """Play one headless game in a worker process and return a picklable summary."""
+    result = run_headless(seed = seed, max_turns = max_turns, max_floor = max_floor)
+    turn_ms = sorted(t * 1000 for t in result.turn_times)
+    return {
+        "seed": seed,
+        "floor": result.floor,
+        "turns": result.turns,
+        "kills": result.kills,
+        "alive": result.alive,
+        "cause_of_death": result.cause_of_death,
+        "seconds": result.seconds,
+        "turn_ms_mean": statistics.fmean(turn_ms) if turn_ms else 0.0,
+        "turn_ms_p95": turn_ms[int(len(turn_ms) * 0.95)] if turn_ms else 0.0,
+        "turn_ms_max": turn_ms[-1] if turn_ms else 0.0,
+    }
+
+def run_batch(
+    games: int,
+    *,
+    first_seed: int = 0,
+    max_turns: int = 1000,
+    max_floor: Optional[int] = None,
+    workers: Optional[int] = None,
+)->Iterator[Dict]:
+    """Play games with seeds first_seed.. across a process pool.
+    Summaries are yielded as soon as each game finishes, not in seed order.
+    """
+    # Forked workers start with the game modules already imported.
+    context = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() else None
+    with ProcessPoolExecutor(max_workers = workers, mp_context = context) as executor:
+        futures = [
+            executor.submit(play_game, seed, max_turns, max_floor)
+            for seed in range(first_seed, first_seed + games)
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+class BatchReport:
+    """Aggregate of game summaries from run_batch."""
+
+    def __init__(self)->None:
+        self.results: List[Dict] = []
+
+    def add(self, result: Dict)->None:
+        self.results.append(result)
+
+    def summary(self)->Dict:
+        results = self.results
+        if not results:
+            return {"games": 0}
+        turn_ms = sorted(result["turn_ms_mean"] for result in results)
+        return {
+            "games": len(results),
+            "deaths": sum(not result["alive"] for result in results),
+            "mean_floor": statistics.fmean(result["floor"] for result in results),
+            "floors": dict(sorted(Counter(result["floor"] for result in results).items())),
+            "mean_turns": statistics.fmean(result["turns"] for result in results),
+            "mean_kills": statistics.fmean(result["kills"] for result in results),
+            "causes_of_death": dict(Counter(
+                result["cause_of_death"] for result in results if not result["alive"]
+            ).most_common()),
+            "median_turn_ms": statistics.median(turn_ms),
+            "worst_turn_ms": max(result["turn_ms_max"] for result in results),
+        }
+
+def main()->None:
+    parser = argparse.ArgumentParser(description = "Play many headless games in parallel.")
+    parser.add_argument("--games", type = int, default = 100, help = "Number of games to play.")
+    parser.add_argument("--first-seed", type = int, default = 0, help = "Seed of the first game.")
+    parser.add_argument("--turns", type = int, default = 1000, help = "Maximum turns per game.")
+    parser.add_argument("--max-floor", type = int, default = None, help = "Stop games below this floor.")
+    parser.add_argument("--workers", type = int, default = os.cpu_count(), help = "Number of processes.")
+    parser.add_argument("--output", type = str, default = None, help = "Stream each game's result to this JSON lines file.")
+    args = parser.parse_args()
+
+    # Keep the garbage collector from touching the game data loaded so far,
+    # so the forked workers go on sharing those pages with this process.
+    gc.freeze()
+    report = BatchReport()
+    output: Optional[IO[str]] = open(args.output, "w") if args.output else None
+    try:
+        for result in run_batch(
+            args.games,
+            first_seed = args.first_seed,
+            max_turns = args.turns,
+            max_floor = args.max_floor,
+            workers = args.workers,
+        ):
+            report.add(result)
+            if output:
+                output.write(json.dumps(result) + "\n")
+                output.flush()
+    finally:
+        if output:
+            output.close()
+    print(json.dumps(report.summary(), indent = 2))
+
+
+if __name__=="__main__":
+    main()
@@ -0,0 +1,265 @@
+#! /usr/bin/env python3
+"""Benchmarks for the simulation and rendering hot paths.
+
+Every benchmark runs on fixed seeds, on scenarios.Scenario floors of
+increasing size and population, so results are comparable between runs.
+Each round starts from the same freshly loaded floor and makes the same
+fixed number of calls, so every run measures the same work. Results are
+written as JSON and can be compared against a stored baseline:
+
+    python3 benchmarks.py --output baseline.json
+    python3 benchmarks.py --baseline baseline.json
+
+The comparison exits with status 1 if the median of anything got slower
+than the threshold allows, provided both runs had at least MIN_COMPARE_ROUNDS rounds.
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import pickle
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from tcod.console import Console
+
+from engine import Engine
+import entity_factories
+from message_log import MessageLog
+import procgen
+from scenarios import LAYOUTS, Scenario
+import setup_game
+
+# Floor width, height, monster density, item density and corpses for each size.
+SIZES: Dict[str, Tuple[int, int, float, float, int]] = {
+    "small": (80, 43, 0.003, 0.003, 5),
+    "medium": (160, 90, 0.007, 0.0035, 50),
+    "large": (320, 180, 0.018, 0.0035, 500),
+}
+
+# Fewer rounds than this are too noisy to fail a comparison on.
+MIN_COMPARE_ROUNDS = 5
+
+def build_floor(size: str, layout: str = "open", seed: int = 0)->Engine:
+    width, height, monster_density, item_density, corpses = SIZES[size]
+    return Scenario(
+        width = width,
+        height = height,
+        monster_density = monster_density,
+        item_density = item_density,
+        corpses = corpses,
+        layout = layout,
+        immortal_player = True,
+        seed = seed,
+    ).build()
+
+def bench_handle_enemy_turns(engine: Engine)->Callable[[], None]:
+    return engine.handle_enemy_turns
+
+def bench_update_fov(engine: Engine)->Callable[[], None]:
+    return engine.update_fov
+
+def bench_get_path_to(engine: Engine)->Callable[[], None]:
+    player = engine.player
+    monster = max(
+        (actor for actor in engine.game_map.actors if actor is not player),
+        key = lambda actor: actor.distance(player.x, player.y),
+    )
+    return lambda: monster.ai.get_path_to(player.x, player.y)
+
+def bench_game_map_render(engine: Engine)->Callable[[], None]:
+    console = Console(engine.game_map.width, engine.game_map.height, order = "F")
+    return lambda: engine.game_map.render(console)
+
+def bench_message_log_render(engine: Engine)->Callable[[], None]:
+    log = MessageLog()
+    for i in range(log.max_messages):
+        log.add_message(f"The Goblin attacks the Player for {i % 7} hit points.")
+        if i % 3:
+            # Repeats stack instead of adding a message.
+            log.add_message(f"The Goblin attacks the Player for {i % 7} hit points.")
+    console = Console(80, 50, order = "F")
+    return lambda: log.render(console, x = 21, y = 45, width = 40, height = 5)
+
+def bench_generate_dungeon(engine: Engine)->Callable[[], None]:
+    game_map = engine.game_map
+    return lambda: procgen.generate_dungeon(
+        max_rooms = 30 * (game_map.width * game_map.height) // (80 * 43),
+        room_min_size = 6,
+        room_max_size = 10,
+        map_width = game_map.width,
+        map_height = game_map.height,
+        engine = engine,
+    )
+
+def bench_entity_spawn(engine: Engine)->Callable[[], None]:
+    game_map = engine.game_map
+
+    def spawn()->None:
+        spawned = [
+            entity_factories.orc.spawn(game_map, x % game_map.width, 1)
+            for x in range(100)
+        ]
+        for entity in spawned:
+            game_map.remove_entity(entity)
+    return spawn
+
+def bench_save_as(engine: Engine)->Callable[[], None]:
+    filename = os.path.join(tempfile.mkdtemp(), "benchmark.sav")
+    return lambda: engine.save_as(filename)
+
+def bench_load_game(engine: Engine)->Callable[[], None]:
+    filename = os.path.join(tempfile.mkdtemp(), "benchmark.sav")
+    engine.save_as(filename)
+    return lambda: setup_game.load_game(filename)
+
+class Benchmark(NamedTuple):
+    # Takes a fresh floor and returns the call to time.
+    setup: Callable[[Engine], Callable[[], None]]
+    # Calls per round, fixed so every run does the same work.
+    number: int
+    # False if the work does not depend on the floor, so it is run once rather than per size.
+    sized: bool = True
+
+BENCHMARKS: Dict[str, Benchmark] = {
+    "handle_enemy_turns": Benchmark(bench_handle_enemy_turns, 10),
+    "update_fov": Benchmark(bench_update_fov, 200),
+    "get_path_to": Benchmark(bench_get_path_to, 20),
+    "game_map_render": Benchmark(bench_game_map_render, 100),
+    "message_log_render": Benchmark(bench_message_log_render, 500, sized = False),
+    "generate_dungeon": Benchmark(bench_generate_dungeon, 2),
+    "entity_spawn": Benchmark(bench_entity_spawn, 20),
+    "save_as": Benchmark(bench_save_as, 3),
+    "load_game": Benchmark(bench_load_game, 10),
+}
+
+def time_rounds(benchmark: Benchmark, floor: bytes, rounds: int)->List[float]:
+    """Seconds per call in each round. Every round sets up on its own copy of
+    the pickled floor, outside the timing, so calls that change the floor,
+    such as enemy turns, do the same work in every round. As in timeit, the
+    garbage collector is off while timing.
+    """
+    times = []
+    for _ in range(rounds):
+        func = benchmark.setup(pickle.loads(floor))
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            for _ in range(benchmark.number):
+                func()
+            times.append((time.perf_counter() - start) / benchmark.number)
+        finally:
+            gc.enable()
+    return times
+
+def run_benchmarks(
+    names: Optional[List[str]] = None,
+    sizes: Optional[List[str]] = None,
+    *,
+    rounds: int = 10,
+    layout: str = "open",
+    seed: int = 0,
+)->Dict:
+    """Run the named benchmarks on floors of each size, returning JSON ready results."""
+    sizes = sizes or list(SIZES)
+    floors: Dict[str, bytes] = {}
+    results = {}
+    for name in names or list(BENCHMARKS):
+        benchmark = BENCHMARKS[name]
+        for size in sizes if benchmark.sized else sizes[:1]:
+            if size not in floors:
+                floors[size] = pickle.dumps(build_floor(size, layout, seed))
+            times = sorted(t * 1000 for t in time_rounds(benchmark, floors[size], rounds))
+            results[f"{name}/{size}" if benchmark.sized else name] = {
+                "median_ms": statistics.median(times),
+                "min_ms": times[0],
+                "max_ms": times[-1],
+                "rounds": rounds,
+                "number": benchmark.number,
+            }
+    return {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "layout": layout,
+        "seed": seed,
+        "results": results,
+    }
+
+def compare(current: Dict, baseline: Dict, threshold: float)->List[Dict]:
+    """Compare medians against a baseline. A benchmark has regressed if its
+    median is more than threshold (a fraction) slower, even its fastest round
+    is slower than the baseline's slowest, and both runs had enough rounds
+    for that to mean something.
+    """
+    comparisons = []
+    for key, result in current["results"].items():
+        if key not in baseline["results"]:
+            continue
+        before = baseline["results"][key]
+        ratio = result["median_ms"] / before["median_ms"] if before["median_ms"] > 0 else 1.0
+        enough_rounds = min(result["rounds"], before["rounds"]) >= MIN_COMPARE_ROUNDS
+        comparisons.append({
+            "benchmark": key,
+            "baseline_ms": before["median_ms"],
+            "current_ms": result["median_ms"],
+            "ratio": ratio,
+            "regressed": enough_rounds and ratio > 1 + threshold and result["min_ms"] > before["max_ms"],
+            "too_few_rounds": not enough_rounds,
+        })
+    return comparisons
+
+def main()->None:
+    parser = argparse.ArgumentParser(description = "Benchmark the simulation and rendering hot paths.")
+    parser.add_argument("--only", default = None, help = "Comma separated benchmarks to run: " + ",".join(BENCHMARKS))
+    parser.add_argument("--sizes", default = ",".join(SIZES), help = "Comma separated floor sizes to run.")
+    parser.add_argument("--rounds", type = int, default = 10, help = "Timed rounds per benchmark.")
+    parser.add_argument("--layout", choices = LAYOUTS, default = "open", help = "Layout of the synthetic floors.")
+    parser.add_argument("--seed", type = int, default = 0, help = "Seed for the synthetic floors.")
+    parser.add_argument("--output", default = None, help = "Write results to this JSON file.")
+    parser.add_argument("--baseline", default = None, help = "Compare against results in this JSON file.")
+    parser.add_argument("--threshold", type = float, default = 0.2, help = "Slowdown, as a fraction, that counts as a regression.")
+    args = parser.parse_args()
+
+    current = run_benchmarks(
+        args.only.split(",") if args.only else None,
+        args.sizes.split(","),
+        rounds = args.rounds,
+        layout = args.layout,
+        seed = args.seed,
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent = 2)
+
+    if not args.baseline:
+        for key, result in current["results"].items():
+            print(f"{key:32} {result['median_ms']:10.3f} ms")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    comparisons = compare(current, baseline, args.threshold)
+    for comparison in comparisons:
+        flag = "  REGRESSION" if comparison["regressed"] else ""
+        if not comparison["regressed"] and comparison["ratio"] > 1 + args.threshold:
+            if comparison["too_few_rounds"]:
+                flag = f"  slower, but fewer than {MIN_COMPARE_ROUNDS} rounds to tell"
+            else:
+                flag = "  slower, but within the baseline's spread"
+        print(
+            f"{comparison['benchmark']:32} {comparison['baseline_ms']:10.3f} ms -> "
+            f"{comparison['current_ms']:10.3f} ms ({comparison['ratio']:.2f}x){flag}"
+        )
+    if any(comparison["regressed"] for comparison in comparisons):
+        sys.exit(1)
+
+
+if __name__=="__main__":
+    main()
@@ -1,7 +1,6 @@
 from __future__ import annotations
 from typing import List, Optional, Tuple, TYPE_CHECKING
 
-import random
 import numpy as np
 import tcod
 
@@ -17,6 +16,7 @@ class BaseAI(Action):
         raise NotImplementedError()
 
     def get_path_to(self, dest_x: int, dest_y: int)->List[Tuple[int,int]]:
+        self.engine.counters.count("paths")
         cost = np.array(self.entity.game_map.tiles["walkable"],dtype = np.int8)
 
         for entity in self.entity.game_map.entities:
@@ -46,7 +46,7 @@ class ConfusedEnemy(BaseAI):
             self.engine.message_log.add_message(f"The {self.entity.name} is no longer confused.")
             self.entity.ai = self.previous_ai
         else:
-            direction_x, direction_y = random.choice(
+            direction_x, direction_y = self.engine.rng.stream("ai").choice(
                 [
                     (-1,-1),
                     (0,-1),
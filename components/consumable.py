@@ -8,6 +8,7 @@ from components.base_component import BaseComponent
 import components.inventory
 import components.ai
 from exceptions import Impossible
+from game_events import ConfuseEvent, DamageEvent, HealEvent
 from input_handlers import (
     ActionOrHandler,
     SingleRangedAttackHandler,
@@ -31,7 +32,7 @@ class Consumable(BaseComponent):
         entity = self.parent
         inventory = entity.parent
         if isinstance(inventory, components.inventory.Inventory):
-            inventory.items.remove(entity)
+            inventory.remove(entity)
 
 class HealingConsumable(Consumable):
     def __init__(self, amount: int):
@@ -42,10 +43,7 @@ class HealingConsumable(Consumable):
         amount_recovered = consumer.fighter.heal(self.amount)
 
         if amount_recovered > 0:
-            self.engine.message_log.add_message(
-                f"You consume the {self.parent.name} and recover {amount_recovered} health.",
-                color.health_recovered
-            )
+            self.engine.events.publish(HealEvent(self.parent.name, amount_recovered))
             self.consume()
         else:
             raise Impossible("Your health is already full.")
@@ -67,7 +65,7 @@ class LightningDamageConsumable(Consumable):
                     target = actor
                     closest_distance = distance
         if target:
-            self.engine.message_log.add_message(f"A lightning bolt strikes the {target.name} for {self.damage} damage.")
+            self.engine.events.publish(DamageEvent("lightning", target.name, self.damage))
             target.fighter.take_damage(self.damage)
             self.consume()
         else:
@@ -95,10 +93,7 @@ class ConfusionConsumable(Consumable):
         if target is consumer:
             raise Impossible("You cannot target yourself.")
 
-        self.engine.message_log.add_message(
-            f"The eyes of the {target.name} look vacant, as it starts to stumble around.",
-            color.status_effect_applied,
-        )
+        self.engine.events.publish(ConfuseEvent(target.name))
         target.ai = components.ai.ConfusedEnemy(
             entity = target, previous_ai = target.ai, turns_remaining = self.number_of_turns
         )
@@ -122,11 +117,10 @@ class FireballDamageConsumable(Consumable):
         if not self.engine.game_map.visible[target_xy]:
             raise Impossible("You cannot target an area that you cannot see.")
         targets_hit = False
+        # Copied, since the dead are taken off the map as the loop goes.
         for actor in self.engine.game_map.actors:
             if actor.distance(*target_xy) <= self.radius:
-                self.engine.message_log.add_message(
-                    f"The {actor.name} is engulfed in a fiery explosion, taking {self.damage} damage."
-                )
+                self.engine.events.publish(DamageEvent("fireball", actor.name, self.damage))
                 actor.fighter.take_damage(self.damage)
                 targets_hit = True
         if not targets_hit:
@@ -2,14 +2,13 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
-import random
-
 from components.base_component import BaseComponent
+from game_events import DeathEvent
 from render_order import RenderOrder
-import color
 
 if TYPE_CHECKING:
     from entity import Actor
+    from rng import RandomStream
 
 class Fighter(BaseComponent):
     parent: Actor
@@ -35,10 +34,11 @@ class Fighter(BaseComponent):
         self.damage_die_size = damage_die_size
         self.damage_die_number = damage_die_number
         self.resistance = resistance
+        # Prototypes start with average rolls for the extra hit dice, so nothing random
+        # happens at import. Spawned actors roll their own with roll_hp.
         self.max_hp = max(1,self.hit_dice_size + self.constitution_mod)
-        if self.hit_dice_num > 1:
-            for i in range(0,self.hit_dice_num-1):
-                self.max_hp += max(1,random.randint(1,self.hit_dice_size) + self.constitution_mod)
+        for i in range(0,self.hit_dice_num-1):
+            self.max_hp += max(1,(self.hit_dice_size+1)//2 + self.constitution_mod)
         self.hp = self.max_hp
 
     @property
@@ -88,6 +88,13 @@ class Fighter(BaseComponent):
     #     # print(self.hp)
 
 
+    def roll_hp(self, rng: RandomStream)->None:
+        """Roll max hp from the hit dice, the first die always counting in full, and heal fully."""
+        self.max_hp = max(1,self.hit_dice_size + self.constitution_mod)
+        for i in range(0,self.hit_dice_num-1):
+            self.max_hp += max(1,rng.randint(1,self.hit_dice_size) + self.constitution_mod)
+        self._hp = self.max_hp
+
     @property
     def defense(self)->int:
         return 10 + self.dexterity_mod + self.defense_bonus
@@ -125,20 +132,21 @@ class Fighter(BaseComponent):
         self.hp -= amount
 
     def die(self) -> None:
-        if self.engine.player is self.parent:
-            death_message = "You died!"
-            death_message_color = color.player_die
+        actor = self.parent
+        engine = self.engine
+        death_event = DeathEvent(actor.name, engine.player is actor)
+
+        actor.char = "%"
+        actor.color = (191,0,0)
+        actor.blocks_movement = False
+        actor.ai = None
+        actor.name = f"The remains of {actor.name}"
+        actor.render_order = RenderOrder.CORPSE
+        if actor is engine.player:
+            actor.game_map.actor_died(actor)
         else:
-            death_message = f"{self.parent.name} is dead"
-            death_message_color = color.enemy_die
-
-
-        self.parent.char = "%"
-        self.parent.color = (191,0,0)
-        self.parent.blocks_movement = False
-        self.parent.ai = None
-        self.parent.name = f"The remains of {self.parent.name}"
-        self.parent.render_order = RenderOrder.CORPSE
+            # Only the player's corpse is still needed as an actor, for the game over screen.
+            actor.game_map.add_corpse(actor)
 
-        self.engine.message_log.add_message(death_message,death_message_color)
-        self.engine.player.level.add_xp(self.parent.level.xp_given)
+        engine.events.publish(death_event)
+        engine.player.level.add_xp(actor.level.xp_given)
@@ -13,30 +13,38 @@ class Inventory(BaseComponent):
     def __init__(self, capacity: int):
         self.capacity = capacity
         self.items: List[Item] = list()
+        # The same items stacked by name, so sizes and counts never scan the list.
+        self.stacks: Dict[str, List[Item]] = {}
+
+    def add(self, item: Item)->None:
+        """Put an item in the inventory, on the stack of items with its name."""
+        item.parent = self
+        self.items.append(item)
+        self.stacks.setdefault(item.name, []).append(item)
+
+    def remove(self, item: Item)->None:
+        """Take an item out of the inventory, removing its stack if it was the last one."""
+        self.items.remove(item)
+        stack = self.stacks[item.name]
+        stack.remove(item)
+        if not stack:
+            del self.stacks[item.name]
 
     def drop(self, item: Item) -> None:
         """
         Removes an item from the inventory and restores it to the game map, at the player's current location.
         """
-        self.items.remove(item)
+        self.remove(item)
         item.place(self.parent.x,self.parent.y,self.game_map)
         self.engine.message_log.add_message(f"You dropped the {item.name}.")
 
     @property
     def current_size(self):
-        return len(self.item_names)
+        return len(self.stacks)
 
     @property
     def item_names(self):
-        names = []
-        for item in self.items:
-            if item.name not in names:
-                names.append(item.name)
-        return names
+        return list(self.stacks)
 
     def item_num(self, name: str):
-        number = 0
-        for item in self.items:
-            if item.name == name:
-                number += 1
-        return number
+        return len(self.stacks.get(name, ()))
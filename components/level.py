@@ -2,9 +2,8 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
-import random
-
 from components.base_component import BaseComponent
+from game_events import LevelUpEvent, XpEvent
 
 if TYPE_CHECKING:
     from entity import Actor
@@ -40,15 +39,15 @@ class Level(BaseComponent):
 
         self.current_xp += xp
 
-        self.engine.message_log.add_message(f"You gain {xp} experience.")
+        self.engine.events.publish(XpEvent(xp))
         if self.requires_level_up:
-            self.engine.message_log.add_message(f"You advance to level {self.current_level+1}.")
+            self.engine.events.publish(LevelUpEvent(self.current_level+1))
 
     def increase_level(self)->None:
         self.current_xp -= self.experience_to_next_level
         self.current_level += 1
         self.parent.fighter.hit_dice_num += 1
-        new_hp = max(1,random.randint(1,self.parent.fighter.hit_dice_size)+self.parent.fighter.constitution_mod)
+        new_hp = max(1,self.engine.rng.stream("level").randint(1,self.parent.fighter.hit_dice_size)+self.parent.fighter.constitution_mod)
         self.parent.fighter.max_hp += new_hp
         self.parent.fighter.hp += new_hp
 
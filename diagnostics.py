@@ -0,0 +1,188 @@
+"""Memory accounting for a running game.
+
+memory_report walks the engine with sys.getsizeof and breaks the bytes
+down per floor (tiles, masks, decorations, entities by class, components
+by name) and for the message log. Data shared by every game, such as the
+entity prototypes and the tile registry, is reported once under "shared"
+and not charged to the floors that use it. If tracemalloc is tracing, the report
+also includes its totals and the files that allocated the most.
+"""
+from __future__ import annotations
+
+from collections import Counter, deque
+import json
+import sys
+import tracemalloc
+from types import FunctionType, ModuleType
+from typing import Dict, IO, Optional, Set, TYPE_CHECKING
+
+import numpy as np
+
+from entity import prototypes
+import tile_types
+
+if TYPE_CHECKING:
+    from engine import Engine
+    from game_map import GameMap
+
+# Attributes of entities that hold components, in the order they are charged.
+COMPONENTS = ("ai", "equipment", "fighter", "inventory", "level", "consumable", "equippable")
+
+def sizeof(obj: object, seen: Set[int])->int:
+    """Bytes used by obj and everything it refers to, skipping anything whose
+    id is in seen. Everything counted is added to seen.
+    """
+    total = 0
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if id(current) in seen or isinstance(current, (type, ModuleType, FunctionType)):
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current)
+        if isinstance(current, np.ndarray):
+            if current.base is not None:
+                stack.append(current.base)
+        elif isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset, deque)):
+            stack.extend(current)
+        elif hasattr(current, "__dict__"):
+            stack.append(current.__dict__)
+    return total
+
+def shared_ids()->Set[int]:
+    """Ids of the data shared by every game in the process."""
+    seen: Set[int] = set()
+    sizeof(prototypes, seen)
+    sizeof(tile_types.tile_table, seen)
+    return seen
+
+def floor_report(game_map: GameMap, seen: Set[int])->Dict:
+    """Bytes used by one floor, adding everything counted to seen."""
+    # Walks stop at the map and at entities, which everything on the floor
+    # refers back to through parent. Those are counted last.
+    held_back = {id(game_map), id(game_map.__dict__)}
+    held_back.update(id(entity) for entity in game_map.entities)
+    held_back.difference_update(seen)
+    seen.update(held_back)
+
+    tiles = sizeof(game_map.tiles, seen)
+    # Each array on its own: the id of a temporary container could be reused
+    # by the next floor's, which seen would then skip.
+    masks = sum(sizeof(mask, seen) for mask in game_map.stored_masks)
+    background = sizeof(game_map.cached_background, seen)
+    decorations = sizeof(game_map.decorations, seen)
+
+    entities: Counter = Counter()
+    entity_counts: Counter = Counter()
+    components: Counter = Counter()
+    for entity in game_map.entities:
+        for name in COMPONENTS:
+            component = getattr(entity, name, None)
+            if component is not None:
+                components[name] += sizeof(component, seen)
+    for entity in game_map.entities:
+        class_name = type(entity).__name__
+        entity_counts[class_name] += 1
+        if id(entity) in held_back:
+            entities[class_name] += sys.getsizeof(entity) + sizeof(entity.__dict__, seen)
+
+    seen.difference_update((id(game_map), id(game_map.__dict__)))
+    other = sizeof(game_map, seen)
+    return {
+        "tiles": tiles,
+        "masks": masks,
+        "background": background,
+        "decorations": decorations,
+        "entities": dict(entities),
+        "entity_counts": dict(entity_counts),
+        "components": dict(components),
+        "other": other,
+        "total": (
+            tiles + masks + background + decorations
+            + sum(entities.values()) + sum(components.values()) + other
+        ),
+    }
+
+def tracemalloc_report(limit: int = 10)->Optional[Dict]:
+    """Traced totals and the files that allocated the most, if tracemalloc is on."""
+    if not tracemalloc.is_tracing():
+        return None
+    current, peak = tracemalloc.get_traced_memory()
+    statistics = tracemalloc.take_snapshot().statistics("filename")
+    return {
+        "current": current,
+        "peak": peak,
+        "top_files": [
+            {"file": stat.traceback[0].filename, "size": stat.size, "count": stat.count}
+            for stat in statistics[:limit]
+        ],
+    }
+
+def memory_report(engine: Engine)->Dict:
+    """Bytes used by the engine, per floor, by the message log, and by shared data."""
+    seen = shared_ids()
+    shared = sizeof([prototypes, tile_types.tile_table], set())
+    # Stop the walks at the engine, so floors do not count each other through it.
+    seen.update((id(engine), id(engine.game_world)))
+    seen.add(id(engine.__dict__))
+    seen.add(id(engine.game_world.__dict__))
+
+    message_log = sizeof(engine.message_log, seen)
+    floors = []
+    for number, game_map in enumerate(engine.game_world.game_levels, start = 1):
+        report = floor_report(game_map, seen)
+        report["floor"] = number
+        report["active"] = game_map is engine.game_map
+        floors.append(report)
+    # Whatever else the engine holds: the player if it is not on a floor, the RNG, timers...
+    seen.difference_update((id(engine), id(engine.__dict__)))
+    other = sizeof(engine, seen)
+    return {
+        "floors": floors,
+        "message_log": message_log,
+        "engine_other": other,
+        "total": sum(floor["total"] for floor in floors) + message_log + other,
+        "shared": shared,
+        "tracemalloc": tracemalloc_report(),
+    }
+
+class MemorySnapshots:
+    """Writes a memory_report to a JSON lines file every so many turns."""
+
+    def __init__(self, output: IO[str], every: int = 100):
+        self.output = output
+        self.every = every
+
+    def __call__(self, engine: Engine, turn: int)->None:
+        if turn % self.every:
+            return
+        report = memory_report(engine)
+        report["turn"] = turn
+        self.output.write(json.dumps(report) + "\n")
+        self.output.flush()
+
+def summarize(report: Dict)->str:
+    """A few human readable lines from a memory_report."""
+    lines = [
+        f"Total {report['total'] / 1024:.1f} KiB, message log {report['message_log'] / 1024:.1f} KiB, "
+        f"shared {report['shared'] / 1024:.1f} KiB"
+    ]
+    for floor in report["floors"]:
+        entities = ", ".join(
+            f"{count} {name} {floor['entities'][name] / 1024:.1f} KiB"
+            for name, count in floor["entity_counts"].items()
+        )
+        components = ", ".join(f"{name} {size / 1024:.1f}" for name, size in floor["components"].items())
+        lines.append(
+            f"Floor {floor['floor']}{' (active)' if floor['active'] else ''}: {floor['total'] / 1024:.1f} KiB, "
+            f"tiles {floor['tiles'] / 1024:.1f}, masks {floor['masks'] / 1024:.1f}, "
+            f"background {floor['background'] / 1024:.1f}, decorations {floor['decorations'] / 1024:.1f}; "
+            f"{entities}; components KiB: {components}"
+        )
+    if report["tracemalloc"]:
+        traced = report["tracemalloc"]
+        lines.append(f"tracemalloc: {traced['current'] / 2**20:.1f} MiB now, {traced['peak'] / 2**20:.1f} MiB peak")
+    return "\n".join(lines)
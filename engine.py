@@ -1,13 +1,16 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING
+from typing import Optional, Tuple, TYPE_CHECKING
 
 from tcod.context import Context
 from tcod.console import Console
 from tcod.map import compute_fov
 
 import exceptions
+from game_events import EventBus
 import render_functions
 from message_log import MessageLog
+from rng import GameRNG
+from timing import TurnCounters, TurnTimers
 
 import lzma
 import pickle
@@ -15,30 +18,89 @@ import pickle
 if TYPE_CHECKING:
     from game_map import GameMap,GameWorld
     from entity import Actor
+    from journal import ActionJournal
 
 class Engine:
-    game_map: GameMap
     game_world: GameWorld
 
-    def __init__(self, player: Actor ):
-        self.message_log = MessageLog()
+    def __init__(
+        self,
+        player: Actor,
+        seed: Optional[int] = None,
+        *,
+        max_messages: int = 1000,
+        message_spill: Optional[str] = None,
+    ):
+        self.rng = GameRNG(seed)
+        # Messages past max_messages are appended to message_spill, if given, then dropped.
+        self.message_log = MessageLog(max_messages, message_spill)
+        self.events = EventBus()
+        # Headless runs can unsubscribe this to skip logging game events entirely.
+        self.events.subscribe(self.message_log.add_event)
         self.player = player
-        self.mouse_location = (0,0)
+        # Records the player's actions for replay, if set.
+        self.journal: Optional[ActionJournal] = None
+        # How long each phase of recent turns and frames took, and what they did.
+        self.timers = TurnTimers()
+        self.counters = TurnCounters()
+        # Draw the performance overlay over the map.
+        self.show_performance = False
+        self._mouse_location = (0,0)
+        self._dirty = True
+        self._drawn_log_version = self.message_log.version
+
+    @property
+    def dirty(self)->bool:
+        """True if anything drawn by render may have changed since the last frame."""
+        return self._dirty or self.message_log.version != self._drawn_log_version
+
+    @dirty.setter
+    def dirty(self, value: bool)->None:
+        self._dirty = value
+        if not value:
+            self._drawn_log_version = self.message_log.version
+
+    @property
+    def mouse_location(self)->Tuple[int,int]:
+        return self._mouse_location
+
+    @mouse_location.setter
+    def mouse_location(self, location: Tuple[int,int])->None:
+        if location != self._mouse_location:
+            self._mouse_location = location
+            self._dirty = True
+
+    @property
+    def game_map(self)->GameMap:
+        return self._game_map
+
+    @game_map.setter
+    def game_map(self, game_map: GameMap)->None:
+        """Make game_map the active floor, packing the masks of the floor being left."""
+        previous = getattr(self, "_game_map", None)
+        if previous is not None and previous is not game_map:
+            previous.pack_masks()
+        self._game_map = game_map
 
     def handle_enemy_turns(self)->None:
-        for entity in set(self.game_map.actors) - {self.player}:
+        for entity in [actor for actor in self.game_map.actors if actor is not self.player]:
+            if not entity.is_alive:
+                # Killed earlier in this phase, e.g. by a confused monster.
+                continue
+            self.counters.count("actors")
             try:
                 entity.ai.perform()
             except exceptions.Impossible:
                 pass
 
     def update_fov(self)-> None:
+        self.counters.count("fov")
         self.game_map.visible[:] = compute_fov(
             self.game_map.tiles["transparent"],
             (self.player.x,self.player.y),
             radius = 8,)
 
-        self.game_map.explored |= self.game_map.visible
+        self.game_map.reveal_visible()
 
     def render(self, console: Console)->None:
         self.game_map.render(console)
@@ -54,6 +116,16 @@ class Engine:
         )
         render_functions.render_names_at_mouse_location(console=console, x=21, y=44, engine = self)
         self.message_log.render(console = console, x=21, y=45, width = 40, height = 5)
+        if self.show_performance:
+            render_functions.render_performance_overlay(console = console, x = 52, y = 0, engine = self)
+
+    def close(self)->None:
+        """Close the files the game appends to as it is played: the message
+        log's spill file and the journal. They are reopened if written to again.
+        """
+        self.message_log.close()
+        if self.journal is not None:
+            self.journal.close()
 
     def save_as(self, filename:str)->None:
         """Save this Engine instance as a compressed file."""
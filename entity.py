@@ -1,8 +1,9 @@
 from __future__ import annotations
 import copy
 import math
+import zlib
 
-from typing import Optional,Tuple,Type,TypeVar,TYPE_CHECKING,Union
+from typing import Dict,Optional,Tuple,Type,TypeVar,TYPE_CHECKING,Union
 
 from render_order import RenderOrder
 
@@ -18,12 +19,44 @@ if TYPE_CHECKING:
 
 T = TypeVar("T",bound="Entity")
 
+# Registry of every entity prototype, shared by all games in the process.
+prototypes: Dict[str, "Entity"] = {}
+
+# Attributes that usually still match the prototype, and are then left out of saves.
+STATIC_ATTRIBUTES = ("char", "color", "name", "blocks_movement", "_render_order")
+# Components that never change once spawned. Saves refer to the prototype's copy instead.
+STATIC_COMPONENTS = ("consumable", "equippable")
+
+def register_prototype(prototype_id: str, prototype: T)->T:
+    """Register an entity as the prototype for everything spawned from it."""
+    prototype.prototype_id = prototype_id
+    prototypes[prototype_id] = prototype
+    return prototype
+
+def get_prototype(prototype_id: str)->Entity:
+    if prototype_id not in prototypes:
+        import entity_factories  # noqa: F401 Imported for its side effect of registering the prototypes.
+    return prototypes[prototype_id]
+
+def prototype_version(prototype: Entity)->int:
+    """A checksum of everything saves may take from the prototype instead of storing it.
+    It changes whenever any of that does, so saves can tell their prototype was edited.
+    """
+    parts = [(name, prototype.__dict__.get(name)) for name in STATIC_ATTRIBUTES]
+    for name in STATIC_COMPONENTS:
+        component = getattr(prototype, name, None)
+        if component is not None:
+            parts.append((name, type(component).__qualname__, sorted(_component_state(component).items())))
+    return zlib.crc32(repr(parts).encode())
+
 class Entity:
     """
     A generic object to represent players, enemies, items, etc...
     """
 
     parent: Union[GameMap,Inventory]
+    # Id of the registered prototype this entity was spawned from, if any.
+    prototype_id: Optional[str] = None
 
     def __init__(
         self,
@@ -45,35 +78,86 @@ class Entity:
         self.render_order = render_order
         if parent:
             self.parent = parent
-            parent.entities.add(self)
+            parent.add_entity(self)
+
+    def __getstate__(self):
+        """Leave out anything that is still the same as the prototype's."""
+        state = self.__dict__.copy()
+        if self.prototype_id is None or self.prototype_id not in prototypes:
+            return state
+        prototype = prototypes[self.prototype_id]
+        state["prototype_version"] = prototype_version(prototype)
+        for name in STATIC_ATTRIBUTES:
+            if name in state and state[name] == prototype.__dict__.get(name):
+                del state[name]
+        for name in STATIC_COMPONENTS:
+            component = state.get(name)
+            prototype_component = getattr(prototype, name, None)
+            if (
+                component is not None
+                and type(component) is type(prototype_component)
+                and _component_state(component) == _component_state(prototype_component)
+            ):
+                del state[name]
+        return state
+
+    def __setstate__(self, state)->None:
+        prototype_id = state.get("prototype_id")
+        version = state.pop("prototype_version", None)
+        if prototype_id is not None:
+            prototype = get_prototype(prototype_id)
+            if version is not None and version != prototype_version(prototype):
+                raise ValueError(
+                    f"The save was made with a different version of the {prototype_id!r} prototype."
+                )
+            for name in STATIC_ATTRIBUTES:
+                if name not in state and name in prototype.__dict__:
+                    state[name] = prototype.__dict__[name]
+            for name in STATIC_COMPONENTS:
+                if name not in state and hasattr(prototype, name):
+                    # Deep, so nothing mutable inside is shared with the prototype.
+                    component = copy.deepcopy(getattr(prototype, name), {id(prototype): self})
+                    if component is not None:
+                        component.parent = self
+                    state[name] = component
+        self.__dict__.update(state)
 
     @property
     def game_map(self)->GameMap:
         return self.parent.game_map
 
+    @property
+    def render_order(self)->RenderOrder:
+        return self._render_order
+
+    @render_order.setter
+    def render_order(self, render_order: RenderOrder)->None:
+        previous = getattr(self, "_render_order", None)
+        self._render_order = render_order
+        parent = getattr(self, "parent", None)
+        if previous is not None and hasattr(parent, "render_layers"):
+            # Keep the map's render buckets in step, e.g. when an actor becomes a corpse.
+            parent.move_render_layer(self, previous)
+
     def spawn(self: T, game_map: GameMap, x: int, y: int)->T:
         clone = copy.deepcopy(self)
         clone.x = x
         clone.y = y
         clone.parent = game_map
-        game_map.entities.add(clone)
+        game_map.add_entity(clone)
         return clone
 
     def place(self, x: int, y: int, game_map: Optional[GameMap] = None):
+        """Move this entity to x, y, onto game_map if given, taking it off any map it was on."""
         if game_map:
             if hasattr(self,"parent"):
                 if self.parent is self.game_map:
-                    self.game_map.entities.remove(self)
+                    self.game_map.remove_entity(self)
             self.parent = game_map
-        if self.name != "Player":
-            clone = copy.deepcopy(self)
-            clone.x = x
-            clone.y = y
-            game_map.entities.add(clone)
-        else:
-            self.x = x
-            self.y = y
-            game_map.entities.add(self)
+        self.x = x
+        self.y = y
+        if game_map:
+            game_map.add_entity(self)
 
     def distance(self, x: int, y: int)->float:
         return math.sqrt((x - self.x)**2 + (y - self.y)**2)
@@ -151,3 +235,6 @@ class Item(Entity):
         self.equippable = equippable
         if self.equippable:
             self.equippable.parent = self
+
+def _component_state(component)->dict:
+    return {key: value for key, value in vars(component).items() if key != "parent"}
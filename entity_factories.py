@@ -4,7 +4,7 @@ from components import consumable,equippable
 from components.equipment import Equipment
 from components.inventory import Inventory
 from components.level import Level
-from entity import Actor, Item
+from entity import Actor, Entity, Item, register_prototype
 
 player = Actor(
     char = "@",
@@ -149,3 +149,8 @@ chain_mail = Item(
     name = "Chain Mail",
     equippable = equippable.ChainMail()
 )
+
+# Register every prototype under its name, so saves can refer to them by id.
+for prototype_id, prototype in list(globals().items()):
+    if isinstance(prototype, Entity):
+        register_prototype(prototype_id, prototype)
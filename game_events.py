@@ -0,0 +1,121 @@
+"""Structured records of what happens in a game, and the bus that delivers them.
+Events hold plain data; text is only produced when a subscriber asks for it.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+import color
+
+
+class GameEvent:
+    """Base class for game events."""
+
+    @property
+    def fg(self)->Tuple[int,int,int]:
+        return color.white
+
+    def describe(self)->str:
+        """Return the message log text for this event."""
+        raise NotImplementedError()
+
+@dataclass(frozen=True)
+class AttackEvent(GameEvent):
+    attacker: str
+    target: str
+    by_player: bool
+    damage: Optional[int] = None # None if the attack missed.
+
+    @property
+    def fg(self)->Tuple[int,int,int]:
+        return color.player_atk if self.by_player else color.enemy_atk
+
+    def describe(self)->str:
+        attack_desc = f"{self.attacker.capitalize()} attacks {self.target}"
+        if self.damage is None:
+            return f"{attack_desc} but misses."
+        if self.damage > 0:
+            return f"{attack_desc} for {self.damage} hit points."
+        return f"{attack_desc} but does no damage"
+
+@dataclass(frozen=True)
+class DamageEvent(GameEvent):
+    """Damage dealt by something other than a melee attack."""
+    source: str # "lightning" or "fireball".
+    target: str
+    amount: int
+
+    def describe(self)->str:
+        if self.source == "lightning":
+            return f"A lightning bolt strikes the {self.target} for {self.amount} damage."
+        if self.source == "fireball":
+            return f"The {self.target} is engulfed in a fiery explosion, taking {self.amount} damage."
+        return f"The {self.target} takes {self.amount} damage from {self.source}."
+
+@dataclass(frozen=True)
+class HealEvent(GameEvent):
+    item: str
+    amount: int
+
+    @property
+    def fg(self)->Tuple[int,int,int]:
+        return color.health_recovered
+
+    def describe(self)->str:
+        return f"You consume the {self.item} and recover {self.amount} health."
+
+@dataclass(frozen=True)
+class ConfuseEvent(GameEvent):
+    target: str
+
+    @property
+    def fg(self)->Tuple[int,int,int]:
+        return color.status_effect_applied
+
+    def describe(self)->str:
+        return f"The eyes of the {self.target} look vacant, as it starts to stumble around."
+
+@dataclass(frozen=True)
+class DeathEvent(GameEvent):
+    name: str
+    is_player: bool
+
+    @property
+    def fg(self)->Tuple[int,int,int]:
+        return color.player_die if self.is_player else color.enemy_die
+
+    def describe(self)->str:
+        if self.is_player:
+            return "You died!"
+        return f"{self.name} is dead"
+
+@dataclass(frozen=True)
+class XpEvent(GameEvent):
+    amount: int
+
+    def describe(self)->str:
+        return f"You gain {self.amount} experience."
+
+@dataclass(frozen=True)
+class LevelUpEvent(GameEvent):
+    level: int # The level the player can now advance to.
+
+    def describe(self)->str:
+        return f"You advance to level {self.level}."
+
+class EventBus:
+    """Deliver published events to every subscribed callback, in subscription order."""
+
+    def __init__(self)->None:
+        self.subscribers: List[Callable[[GameEvent],None]] = []
+
+    def subscribe(self, callback: Callable[[GameEvent],None])->None:
+        self.subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[GameEvent],None])->None:
+        self.subscribers.remove(callback)
+
+    def publish(self, event: GameEvent)->None:
+        for callback in self.subscribers:
+            callback(event)
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from typing import Iterable, Iterator, Optional,TYPE_CHECKING
+from collections import deque
+from typing import Deque, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, TYPE_CHECKING
 
 import numpy as np
 from tcod.console import Console
@@ -10,6 +11,7 @@ if TYPE_CHECKING:
     from entity import Entity
 
 from entity import Actor, Item
+from render_order import RenderOrder
 import tile_types
 
 class GameWorld:
@@ -24,7 +26,7 @@ class GameWorld:
         room_max_size: int,
         current_floor: int = 1,
         max_floor: int = 0,
-        game_levels: List[GameMap] = []
+        game_levels: Optional[List[GameMap]] = None
     ):
         self.engine = engine
         self.map_width = map_width
@@ -34,7 +36,7 @@ class GameWorld:
         self.room_max_size = room_max_size
         self.current_floor = current_floor
         self.max_floor = max_floor
-        self.game_levels = game_levels
+        self.game_levels = game_levels if game_levels is not None else []
 
     def generate_floor(self)->None:
         from procgen import generate_dungeon
@@ -51,34 +53,215 @@ class GameWorld:
         )
         self.game_levels.append(self.engine.game_map)
 
+class Decoration(NamedTuple):
+    """Something drawn on the floor that takes no part in the game, such as a corpse."""
+    x: int
+    y: int
+    char: str
+    color: Tuple[int,int,int]
+    name: str
+
 class GameMap:
-    def __init__(self, engine: Engine, width:int, height:int, entities: Iterable[Entity] = ()):
+    """A floor of the dungeon.
+
+    Dead monsters do not stay entities: add_corpse turns each into a
+    Decoration, which costs a few bytes and takes no part in the game. The
+    player is the one exception. engine.player and the game over screen still
+    need the player's Actor after death, so actor_died keeps it as an entity,
+    in dead_actors, which therefore never holds anything but the player.
+    """
+    # Corpses kept per floor by default. Past this the oldest ones out of view rot away.
+    max_corpses = 200
+
+    def __init__(
+        self,
+        engine: Engine,
+        width:int,
+        height:int,
+        entities: Iterable[Entity] = (),
+        max_corpses: Optional[int] = None,
+    ):
         self.engine = engine
         self.width = width
         self.height = height
-        self.entities = set(entities)
+        # Dicts used as insertion ordered sets, so turn order does not depend on memory addresses.
+        self.entities: Dict[Entity, None] = {}
+        # The same entities, bucketed by render order so rendering never sorts.
+        self.render_layers: Dict[RenderOrder, Dict[Entity, None]] = {
+            render_order: {} for render_order in RenderOrder
+        }
+        # And partitioned by kind, so nothing has to filter the whole set.
+        self._living_actors: Dict[Actor, None] = {}
+        self._dead_actors: Dict[Actor, None] = {} # Only ever the player, see the class docstring.
+        self._items: Dict[Item, None] = {}
+        # The items again, piled by tile, oldest at the bottom.
+        self._item_piles: Dict[Tuple[int,int], Dict[Item, None]] = {}
+        for entity in entities:
+            self.add_entity(entity)
+        # Drawn below every entity, oldest first.
+        if max_corpses is not None:
+            self.max_corpses = max_corpses
+        self.decorations: Deque[Decoration] = deque()
+
+        self.tiles = tile_types.TileGrid(width,height,fill_value = tile_types.wall)
+        self._visible = np.full((width,height),fill_value = False, order = "F")
+        self._explored = np.full((width,height),fill_value = False, order = "F")
+        # (visible, explored) as packed bits while this floor is inactive.
+        self._packed_masks: Optional[Tuple[np.ndarray,np.ndarray]] = None
+        self._masks_version = 0
 
-        self.tiles = np.full((width,height),fill_value = tile_types.wall, order = "F")
-        self.visible = np.full((width,height),fill_value = False, order = "F")
-        self.explored = np.full((width,height),fill_value = False, order = "F")
+        # Composited map graphics, reused until the tiles or masks change.
+        self._background: Optional[np.ndarray] = None
+        self._background_key: Optional[Tuple[int,int]] = None
 
         self.downstairs_location = (0,0)
         self.upstairs_location = (0,0)
 
+    def __getstate__(self)->Dict:
+        """Always save the visibility masks as packed bits."""
+        state = self.__dict__.copy()
+        if state["_packed_masks"] is None:
+            state["_packed_masks"] = self._packed()
+            state["_visible"] = state["_explored"] = None
+        state["_background"] = state["_background_key"] = None
+        return state
+
     @property
     def game_map(self):
         return self
 
+    def add_entity(self, entity: Entity)->None:
+        self.entities[entity] = None
+        self.render_layers[entity.render_order][entity] = None
+        if isinstance(entity, Actor):
+            if entity.is_alive:
+                self._living_actors[entity] = None
+            else:
+                self._dead_actors[entity] = None
+        elif isinstance(entity, Item):
+            self._items[entity] = None
+            self._item_piles.setdefault((entity.x, entity.y), {})[entity] = None
+
+    def remove_entity(self, entity: Entity)->None:
+        del self.entities[entity]
+        self.render_layers[entity.render_order].pop(entity, None)
+        self._living_actors.pop(entity, None)
+        self._dead_actors.pop(entity, None)
+        if entity in self._items:
+            del self._items[entity]
+            pile = self._item_piles[entity.x, entity.y]
+            del pile[entity]
+            if not pile:
+                del self._item_piles[entity.x, entity.y]
+
+    def actor_died(self, actor: Actor)->None:
+        """Move an actor on this map from the living to the dead."""
+        if actor in self._living_actors:
+            del self._living_actors[actor]
+            self._dead_actors[actor] = None
+
+    def add_corpse(self, actor: Actor)->None:
+        """Take a dead actor off the map, leaving only a decoration where it fell.
+        Past max_corpses the oldest decoration out of view is dropped. Ones in view
+        are never dropped, since get_names_at_location still reports them; if every
+        decoration is in view the layer grows past the cap until some are not.
+        """
+        self.remove_entity(actor)
+        if len(self.decorations) >= self.max_corpses:
+            visible = self.visible
+            for i, decoration in enumerate(self.decorations):
+                if not visible[decoration.x, decoration.y]:
+                    del self.decorations[i]
+                    break
+        self.decorations.append(Decoration(actor.x, actor.y, actor.char, actor.color, actor.name))
+
+    def move_render_layer(self, entity: Entity, previous: RenderOrder)->None:
+        """Move an entity on this map into the bucket for its new render order."""
+        if entity in self.render_layers[previous]:
+            del self.render_layers[previous][entity]
+            self.render_layers[entity.render_order][entity] = None
+
     @property
-    def actors(self)->Iterator[Actor]:
-        yield from(
-            entity for entity in self.entities
-            if isinstance(entity,Actor) and entity.is_alive
+    def visible(self)->np.ndarray:
+        if self._packed_masks is not None:
+            self.unpack_masks()
+        return self._visible
+
+    @property
+    def explored(self)->np.ndarray:
+        if self._packed_masks is not None:
+            self.unpack_masks()
+        return self._explored
+
+    @property
+    def stored_masks(self)->Tuple[np.ndarray,np.ndarray]:
+        """The visible and explored masks as currently stored: packed bits or full bool arrays."""
+        if self._packed_masks is not None:
+            return self._packed_masks
+        return self._visible, self._explored
+
+    @property
+    def cached_background(self)->Optional[np.ndarray]:
+        """The composited background if one is cached, without building it."""
+        return self._background
+
+    def _packed(self)->Tuple[np.ndarray,np.ndarray]:
+        return (
+            np.packbits(self._visible.ravel(order = "F")),
+            np.packbits(self._explored.ravel(order = "F")),
+        )
+
+    def pack_masks(self)->None:
+        """Store the visible and explored masks as bits, for floors that are not active.
+        The composited background is dropped too; it is rebuilt when next drawn.
+        """
+        if self._packed_masks is None:
+            self._packed_masks = self._packed()
+            self._visible = self._explored = None
+        self._background = self._background_key = None
+
+    def unpack_masks(self)->None:
+        """Restore the visible and explored masks to full bool arrays."""
+        if self._packed_masks is None:
+            return
+        count = self.width * self.height
+        self._visible, self._explored = (
+            np.unpackbits(bits, count = count).astype(bool).reshape((self.width,self.height), order = "F")
+            for bits in self._packed_masks
         )
+        self._packed_masks = None
+
+    def reveal_visible(self)->None:
+        """Mark every visible tile as explored.
+        Must be called whenever the visible mask changes."""
+        explored = self.explored
+        explored |= self.visible
+        self._masks_version += 1
+
+    # actors, dead_actors and items are snapshots, so callers may kill, remove
+    # or spawn entities while looping over them. iter_actors is a live view
+    # for hot loops that only read.
+
+    @property
+    def actors(self)->Tuple[Actor, ...]:
+        """The living actors on this map, kept up to date as they come, go and die."""
+        return tuple(self._living_actors)
 
     @property
-    def items(self)->Iterator[Item]:
-        yield from (entity for entity in self.entities if isinstance(entity,Item))
+    def dead_actors(self)->Tuple[Actor, ...]:
+        return tuple(self._dead_actors)
+
+    @property
+    def items(self)->Tuple[Item, ...]:
+        """The items lying on this map."""
+        return tuple(self._items)
+
+    def iter_actors(self)->Iterator[Actor]:
+        """The living actors, without copying. The map must not change while iterating."""
+        return iter(self._living_actors)
+    def items_at(self, x: int, y: int)->List[Item]:
+        """The items lying on a tile, oldest first."""
+        return list(self._item_piles.get((x, y), ()))
 
     def get_blocking_entity_at_location(self, location_x: int, location_y: int)->Optional[Entity]:
         for entity in self.entities:
@@ -87,7 +270,7 @@ class GameMap:
         return None
 
     def get_actor_at_location(self,x: int, y: int)->Optional[Actor]:
-        for actor in self.actors:
+        for actor in self.iter_actors():
             if actor.x==x and actor.y == y:
                 return actor
         return None
@@ -96,15 +279,43 @@ class GameMap:
         """Return True if x and y are inside of the bounds of this map."""
         return 0 <= x < self.width and 0 <= y < self.height
 
+    @property
+    def background(self)->np.ndarray:
+        """The map tiles as seen by the player, without entities."""
+        key = (self.tiles.version, self._masks_version)
+        if self._background is None or self._background_key != key:
+            self._background = np.select(
+                condlist = [self.visible,self.explored],
+                choicelist=[self.tiles["light"],self.tiles["dark"]],
+                default = tile_types.SHROUD
+            )
+            self._background_key = key
+        return self._background
+
     def render(self,console: Console)->None:
-        console.tiles_rgb[0:self.width, 0:self.height] = np.select(
-            condlist = [self.visible,self.explored],
-            choicelist=[self.tiles["light"],self.tiles["dark"]],
-            default = tile_types.SHROUD
-        )
-        entities_sorted_for_rendering = sorted(self.entities, key=lambda x: x.render_order.value)
-        for entity in entities_sorted_for_rendering:
-            if self.visible[entity.x,entity.y]:
-                console.print(
-                    entity.x, entity.y, entity.char, entity.color
-                )
+        console.tiles_rgb[0:self.width, 0:self.height] = self.background
+
+        # One row of (x, y, ch, r, g, b) per decoration and entity, from the lowest render order up.
+        glyphs = np.array(
+            [
+                (decoration.x, decoration.y, ord(decoration.char), *decoration.color)
+                for decoration in self.decorations
+            ] + [
+                (entity.x, entity.y, ord(entity.char), *entity.color)
+                for render_order in RenderOrder
+                for entity in self.render_layers[render_order]
+            ],
+            dtype = np.int32,
+        ).reshape(-1, 6)
+        glyphs = glyphs[self.visible[glyphs[:,0], glyphs[:,1]]]
+        if not len(glyphs):
+            return
+
+        # Where entities share a tile only the last one drawn, the highest render order, shows.
+        glyphs = glyphs[::-1]
+        _, topmost = np.unique(glyphs[:,0] * self.height + glyphs[:,1], return_index = True)
+        glyphs = glyphs[topmost]
+
+        x, y = glyphs[:,0], glyphs[:,1]
+        console.tiles_rgb["ch"][x,y] = glyphs[:,2]
+        console.tiles_rgb["fg"][x,y] = glyphs[:,3:]
@@ -0,0 +1,268 @@
+#! /usr/bin/env python3
+"""Run games without a window, with the player driven by a bot policy.
+Used to benchmark and soak-test the simulation core.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+import tracemalloc
+from typing import Callable, List, Optional, Type
+
+from actions import (
+    Action,
+    BumpAction,
+    ItemAction,
+    MeleeAction,
+    PickupAction,
+    TakeDownStairsAction,
+    WaitAction,
+)
+from components.ai import BaseAI
+from components.consumable import HealingConsumable
+from engine import Engine
+from game_events import AttackEvent, DamageEvent, DeathEvent, GameEvent
+import diagnostics
+import input_handlers
+from scenarios import LAYOUTS, Scenario
+import setup_game
+import timing
+
+
+class BotPolicy(BaseAI):
+    """Chooses the player's actions in a headless game."""
+
+    def get_action(self)->Action:
+        raise NotImplementedError()
+
+    def level_up(self)->None:
+        """Spend a pending level up."""
+        self.entity.level.increase_constitution()
+
+    def perform(self)->None:
+        self.get_action().perform()
+
+class SeekerBot(BotPolicy):
+    """Fight the nearest visible monster, otherwise head for the down stairs.
+    Drinks a healing potion when below half health and picks up anything it stands on.
+    """
+
+    def get_action(self)->Action:
+        player = self.entity
+        game_map = self.engine.game_map
+
+        if player.fighter.hp < player.fighter.max_hp // 2:
+            for item in player.inventory.items:
+                if isinstance(item.consumable, HealingConsumable):
+                    return ItemAction(player, item)
+
+        targets = [
+            actor for actor in game_map.actors
+            if actor is not player and game_map.visible[actor.x,actor.y]
+        ]
+        if targets:
+            target = min(targets, key = lambda actor: player.distance(actor.x,actor.y))
+            dx = target.x - player.x
+            dy = target.y - player.y
+            if max(abs(dx),abs(dy)) <= 1:
+                return MeleeAction(player,dx,dy)
+            path = self.get_path_to(target.x,target.y)
+        else:
+            if game_map.items_at(player.x, player.y):
+                if player.inventory.current_size < player.inventory.capacity:
+                    return PickupAction(player)
+            if (player.x,player.y) == game_map.downstairs_location:
+                return TakeDownStairsAction(player)
+            path = self.get_path_to(*game_map.downstairs_location)
+
+        if path:
+            dest_x, dest_y = path[0]
+            return BumpAction(player, dest_x - player.x, dest_y - player.y)
+        return WaitAction(player)
+
+class GameStats:
+    """Event bus subscriber that tallies kills and what last hurt the player."""
+
+    def __init__(self, player_name: str):
+        self.player_name = player_name
+        self.kills = 0
+        self.last_damaged_by: Optional[str] = None
+
+    def __call__(self, event: GameEvent)->None:
+        if isinstance(event, DeathEvent):
+            if not event.is_player:
+                self.kills += 1
+        elif isinstance(event, AttackEvent):
+            if event.target == self.player_name and event.damage:
+                self.last_damaged_by = event.attacker
+        elif isinstance(event, DamageEvent):
+            if event.target == self.player_name:
+                self.last_damaged_by = event.source
+
+class HeadlessResult:
+    """Summary of a finished headless game."""
+
+    def __init__(self, engine: Engine, stats: GameStats, turn_times: List[float]):
+        self.engine = engine
+        self.stats = stats
+        self.turn_times = turn_times # Seconds taken by each turn, in order.
+
+    @property
+    def turns(self)->int:
+        return len(self.turn_times)
+
+    @property
+    def seconds(self)->float:
+        return sum(self.turn_times)
+
+    @property
+    def kills(self)->int:
+        return self.stats.kills
+
+    @property
+    def cause_of_death(self)->Optional[str]:
+        if self.alive:
+            return None
+        return self.stats.last_damaged_by
+
+    @property
+    def floor(self)->int:
+        return self.engine.game_world.current_floor
+
+    @property
+    def alive(self)->bool:
+        return self.engine.player.is_alive
+
+    @property
+    def turns_per_second(self)->float:
+        return self.turns / self.seconds if self.seconds > 0 else 0.0
+
+    def __str__(self)->str:
+        status = "alive" if self.alive else f"killed by {self.cause_of_death}"
+        return (
+            f"{self.turns} turns in {self.seconds:.2f}s ({self.turns_per_second:.0f} turns/s), "
+            f"reached floor {self.floor}, {self.kills} kills, {status}"
+        )
+
+def run_headless(
+    policy_cls: Type[BotPolicy] = SeekerBot,
+    *,
+    max_turns: int = 1000,
+    max_floor: Optional[int] = None,
+    seed: Optional[int] = None,
+    log_messages: bool = False,
+    max_messages: int = 1000,
+    message_spill: Optional[str] = None,
+    on_turn: Optional[Callable[[Engine, int], None]] = None,
+    scenario: Optional[Scenario] = None,
+)->HeadlessResult:
+    """Play one game with policy_cls controlling the player.
+
+    The game ends when the player dies, after max_turns turns, or when the
+    player goes below max_floor. Game events are only written to the message
+    log if log_messages is set; the log keeps max_messages and appends older
+    ones to message_spill, if given. on_turn is called with the engine and the
+    number of turns played after every turn, outside the turn timings.
+    If scenario is given the game starts on its floor instead of a new
+    game's, and seed and the message log settings are ignored.
+    """
+    engine = scenario.build() if scenario else setup_game.new_game(
+        seed, max_messages = max_messages, message_spill = message_spill
+    )
+    if not log_messages:
+        engine.events.unsubscribe(engine.message_log.add_event)
+
+    stats = GameStats(engine.player.name)
+    engine.events.subscribe(stats)
+
+    # The game's own turn logic, without any of the interactive handlers.
+    handler = input_handlers.MainGameEventHandler(engine)
+    policy = policy_cls(engine.player)
+
+    turn_times: List[float] = []
+    while len(turn_times) < max_turns and engine.player.is_alive:
+        if max_floor is not None and engine.game_world.current_floor > max_floor:
+            break
+        start = time.perf_counter()
+        if not handler.handle_action(policy.get_action()):
+            # The policy asked for something impossible, pass the turn instead.
+            handler.handle_action(WaitAction(engine.player))
+        if engine.player.level.requires_level_up:
+            policy.level_up()
+        turn_times.append(time.perf_counter() - start)
+        if on_turn:
+            on_turn(engine, len(turn_times))
+
+    engine.events.unsubscribe(stats)
+    engine.close()
+    return HeadlessResult(engine, stats, turn_times)
+
+def main()->None:
+    parser = argparse.ArgumentParser(description = "Play a game without a window using a bot.")
+    parser.add_argument("--turns", type = int, default = 1000, help = "Maximum number of turns.")
+    parser.add_argument("--max-floor", type = int, default = None, help = "Stop below this floor.")
+    parser.add_argument("--seed", type = int, default = None, help = "Seed for the game, random by default.")
+    parser.add_argument("--messages", action = "store_true", help = "Log game events as messages.")
+    parser.add_argument("--max-messages", type = int, default = 1000, help = "Messages kept in memory.")
+    parser.add_argument("--message-spill", default = None, help = "Append messages dropped from memory to this file.")
+    parser.add_argument(
+        "--profile", nargs = "?", const = "headless.prof", default = None,
+        help = "Profile the game and write the stats to this file, headless.prof by default.",
+    )
+    parser.add_argument("--timings", action = "store_true", help = "Print turn phase timings.")
+    parser.add_argument("--memory", action = "store_true", help = "Print where the game's memory went at the end.")
+    parser.add_argument("--memory-snapshots", default = None, help = "Write memory reports to this JSON lines file.")
+    parser.add_argument("--memory-every", type = int, default = 100, help = "Turns between memory snapshots.")
+    parser.add_argument("--tracemalloc", action = "store_true", help = "Trace allocations for the memory reports.")
+    parser.add_argument("--scenario", default = None, metavar = "WIDTHxHEIGHT", help = "Start on a synthetic floor of this size.")
+    parser.add_argument("--monster-density", type = float, default = 0.01, help = "Monsters per walkable tile in the scenario.")
+    parser.add_argument("--item-density", type = float, default = 0.005, help = "Items per walkable tile in the scenario.")
+    parser.add_argument("--corpses", type = int, default = 0, help = "Corpses in the scenario.")
+    parser.add_argument("--layout", choices = LAYOUTS, default = "open", help = "Layout of the scenario.")
+    parser.add_argument("--immortal", action = "store_true", help = "The scenario's player cannot die.")
+    args = parser.parse_args()
+
+    scenario = None
+    if args.scenario:
+        width, height = (int(n) for n in args.scenario.lower().split("x"))
+        scenario = Scenario(
+            width = width,
+            height = height,
+            monster_density = args.monster_density,
+            item_density = args.item_density,
+            corpses = args.corpses,
+            layout = args.layout,
+            immortal_player = args.immortal,
+            seed = args.seed or 0,
+        )
+        print(f"Scenario: {scenario}")
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    snapshots = None
+    if args.memory_snapshots:
+        snapshots = diagnostics.MemorySnapshots(open(args.memory_snapshots, "w"), args.memory_every)
+    try:
+        with timing.profiled(args.profile):
+            result = run_headless(
+                max_turns = args.turns,
+                max_floor = args.max_floor,
+                seed = args.seed,
+                log_messages = args.messages,
+                max_messages = args.max_messages,
+                message_spill = args.message_spill,
+                on_turn = snapshots,
+                scenario = scenario,
+            )
+    finally:
+        if snapshots:
+            snapshots.output.close()
+    print(result)
+    if args.timings:
+        print(result.engine.timers.report())
+    if args.memory:
+        print(diagnostics.summarize(diagnostics.memory_report(result.engine)))
+
+
+if __name__=="__main__":
+    main()
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from typing import Callable, Optional,Tuple, TYPE_CHECKING, Union
 import os
+import time
 
 import tcod.event
 
@@ -76,6 +77,11 @@ MainGameEventHandler will become the active handler.
 """
 
 class BaseEventHandler(tcod.event.EventDispatch[ActionOrHandler]):
+    redraw: bool = True
+    """True if something this handler shows has changed since it was last presented.
+    The main loop skips rendering while this is False.
+    """
+
     def handle_events(self, event:tcod.event.Event)->BaseEventHandler:
         """Handle an event and return the next active event handler."""
         state = self.dispatch(event)
@@ -90,6 +96,12 @@ class BaseEventHandler(tcod.event.EventDispatch[ActionOrHandler]):
     def ev_quit(self, event: tcod.event.Quit)->Optional[Action]:
         raise SystemExit()
 
+    def ev_windowexposed(self, event: tcod.event.WindowEvent)->None:
+        self.redraw = True
+
+    def ev_windowresized(self, event: tcod.event.WindowResized)->None:
+        self.redraw = True
+
 class PopupMessage(BaseEventHandler):
     """Display a popup text window."""
 
@@ -120,6 +132,14 @@ class EventHandler(BaseEventHandler):
     def __init__(self, engine: Engine):
         self.engine = engine
 
+    @property
+    def redraw(self)->bool:
+        return self.engine.dirty
+
+    @redraw.setter
+    def redraw(self, value: bool)->None:
+        self.engine.dirty = value
+
     def handle_events(self, event: tcod.event.Event)->BaseEventHandler:
         """Handle events for input handlers with an engine."""
         action_or_state = self.dispatch(event)
@@ -140,14 +160,26 @@ class EventHandler(BaseEventHandler):
         Returns True if the action will advance a turn."""
         if action is None:
             return False
+        self.engine.dirty = True
+        if self.engine.journal:
+            self.engine.journal.record_action(action)
+        timers = self.engine.timers
+        start = time.perf_counter()
         try:
             action.perform()
         except exceptions.Impossible as exc:
             self.engine.message_log.add_message(exc.args[0],color.impossible)
             return False
+        finally:
+            performed = time.perf_counter()
+            timers.add("action", performed - start)
 
         self.engine.handle_enemy_turns()
+        enemies_done = time.perf_counter()
+        timers.add("enemies", enemies_done - performed)
         self.engine.update_fov()
+        timers.add("fov", time.perf_counter() - enemies_done)
+        self.engine.counters.end_turn()
         return True
 
     def ev_mousemotion(self, event: tcod.event.MouseMotion)->None:
@@ -274,14 +306,10 @@ class LevelUpEventHandler(AskUserEventHandler):
         index = key - tcod.event.K_a
 
         if 0<= index <= 3:
-            if index == 0:
-                player.level.increase_constitution()
-            elif index == 1:
-                player.level.increase_strength()
-            elif index == 2:
-                player.level.increase_agility()
-            else:
-                player.level.increase_intelligence()
+            attribute = ("constitution", "strength", "agility", "intelligence")[index]
+            if self.engine.journal:
+                self.engine.journal.record_level_up(attribute)
+            getattr(player.level, f"increase_{attribute}")()
         else:
             self.engine.message_log.add_message("Invalid entry.", color.invalid)
             return None
@@ -296,9 +324,9 @@ class InventoryEventHandler(AskUserEventHandler):
 
     def on_render(self, console: tcod.Console)-> None:
         super().on_render(console)
-        number_of_items_in_inventory = len(self.engine.player.inventory.items)
+        stacks = self.engine.player.inventory.stacks
 
-        height = number_of_items_in_inventory + 2
+        height = len(stacks) + 2
         if height <= 3:
             height = 3
         if self.engine.player.x <= 30:
@@ -319,16 +347,11 @@ class InventoryEventHandler(AskUserEventHandler):
             bg = (0,0,0),
         )
 
-        if number_of_items_in_inventory > 0:
-            inventory = self.engine.player.inventory.items
-            for i,item_name in enumerate(self.engine.player.inventory.item_names):
+        if stacks:
+            for i,(item_name,stack) in enumerate(stacks.items()):
                 item_key = chr(ord("a")+i)
-                for item in self.engine.player.inventory.items:
-                    if item.name == item_name:
-                        selected_item = item
-                        pass
-                is_equipped = self.engine.player.equipment.item_is_equipped(selected_item)
-                item_string = f"({item_key}) {self.engine.player.inventory.item_num(item_name)}x {item_name}"
+                is_equipped = self.engine.player.equipment.item_is_equipped(stack[-1])
+                item_string = f"({item_key}) {len(stack)}x {item_name}"
 
                 if is_equipped:
                     item_string = f"{item_string} (E)"
@@ -344,10 +367,7 @@ class InventoryEventHandler(AskUserEventHandler):
         if 0<=index<=26:
             try:
                 selected_item_name = player.inventory.item_names[index]
-                for item in player.inventory.items:
-                    if item.name == selected_item_name:
-                        selected_item = item
-                        pass
+                selected_item = player.inventory.stacks[selected_item_name][-1]
             except IndexError:
                 self.engine.message_log.add_message("Invalid Entry.",color.invalid)
                 return None
@@ -491,6 +511,9 @@ class MainGameEventHandler(EventHandler):
             return HistoryViewer(self.engine)
         elif key == tcod.event.K_SLASH:
             return LookHandler(self.engine)
+        elif key == tcod.event.K_F3:
+            self.engine.show_performance = not self.engine.show_performance
+            self.engine.dirty = True
 
 
         return action
@@ -531,7 +554,7 @@ class HistoryViewer(EventHandler):
             y = 1,
             width = log_console.width - 2,
             height = log_console.height - 2,
-            messages = self.engine.message_log.messages[:self.cursor+1]
+            messages = self.engine.message_log.newest_first(self.cursor)
         )
         log_console.blit(console,3,3)
 
@@ -551,4 +574,5 @@ class HistoryViewer(EventHandler):
             self.cursor = self.log_length - 1
         else:
             return MainGameEventHandler(self.engine)
+        self.redraw = True
         return None
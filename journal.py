@@ -0,0 +1,196 @@
+#! /usr/bin/env python3
+"""Record the player's actions to a journal file and replay them.
+
+A journal starts with the game seed, followed by one line per player
+action or level up choice. Since all randomness comes from the seeded
+streams in rng, re-running the entries on a new game with that seed
+reproduces the session exactly.
+"""
+from __future__ import annotations
+
+import argparse
+import pickle
+import time
+from typing import Dict, IO, List, Optional, TYPE_CHECKING
+
+from actions import (
+    Action,
+    ActionWithDirection,
+    BumpAction,
+    DropItem,
+    EquipAction,
+    ItemAction,
+    MeleeAction,
+    MovementAction,
+    PickupAction,
+    TakeDownStairsAction,
+    TakeUpStairsAction,
+    WaitAction,
+)
+
+if TYPE_CHECKING:
+    from engine import Engine
+    from entity import Actor
+
+ACTION_CODES = {
+    BumpAction: "bump",
+    MovementAction: "move",
+    MeleeAction: "melee",
+    WaitAction: "wait",
+    PickupAction: "pickup",
+    TakeDownStairsAction: "down",
+    TakeUpStairsAction: "up",
+    DropItem: "drop",
+    EquipAction: "equip",
+    ItemAction: "use",
+}
+ACTION_TYPES = {code: action_type for action_type, code in ACTION_CODES.items()}
+
+def encode_action(action: Action)->str:
+    """Return the journal line for an action performed by the player."""
+    code = ACTION_CODES[type(action)]
+    if isinstance(action, ActionWithDirection):
+        return f"{code} {action.dx} {action.dy}"
+    if isinstance(action, ItemAction):
+        index = action.entity.inventory.items.index(action.item)
+        if type(action) is ItemAction:
+            return f"{code} {index} {action.target_xy[0]} {action.target_xy[1]}"
+        return f"{code} {index}"
+    return code
+
+def decode_action(line: str, player: Actor)->Action:
+    """Rebuild the action described by a journal line."""
+    code, *args = line.split()
+    action_type = ACTION_TYPES[code]
+    values = [int(arg) for arg in args]
+    if issubclass(action_type, ActionWithDirection):
+        return action_type(player, *values)
+    if issubclass(action_type, ItemAction):
+        item = player.inventory.items[values[0]]
+        if action_type is ItemAction:
+            return ItemAction(player, item, (values[1], values[2]))
+        return action_type(player, item)
+    return action_type(player)
+
+class ActionJournal:
+    """Append-only journal of a game, written as the game is played."""
+
+    def __init__(self, filename: str, seed: int):
+        self.filename = filename
+        with open(filename, "w") as f:
+            f.write(f"seed {seed}\n")
+        self._file: Optional[IO[str]] = None
+
+    def __getstate__(self)->Dict:
+        """Saves keep the journal's filename, and append to it again once loaded."""
+        state = self.__dict__.copy()
+        state["_file"] = None
+        return state
+
+    def write(self, line: str)->None:
+        if self._file is None:
+            self._file = open(self.filename, "a")
+        self._file.write(line + "\n")
+        self._file.flush()
+
+    def record_action(self, action: Action)->None:
+        self.write(encode_action(action))
+
+    def record_level_up(self, attribute: str)->None:
+        """Record a level up spent on attribute, e.g. "strength"."""
+        self.write(f"level {attribute}")
+
+    def close(self)->None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+def read_journal(filename: str)->tuple[int, List[str]]:
+    """Return the seed and the entries of a journal file."""
+    with open(filename) as f:
+        header, *entries = f.read().splitlines()
+    return int(header.split()[1]), entries
+
+class Replay:
+    """Re-run a journal on a headless engine.
+
+    Every checkpoint_every entries the engine is snapshotted in memory, so
+    that seek can jump back to any position without starting over.
+    """
+
+    def __init__(self, filename: str, checkpoint_every: Optional[int] = None):
+        self.seed, self.entries = read_journal(filename)
+        self.checkpoint_every = checkpoint_every
+        self.checkpoints: Dict[int, bytes] = {}
+        self._restart()
+
+    def _restart(self)->None:
+        import setup_game
+
+        self._set_engine(setup_game.new_game(self.seed), 0)
+
+    def _set_engine(self, engine: Engine, position: int)->None:
+        import input_handlers
+
+        self.engine = engine
+        if engine.message_log.add_event in engine.events.subscribers:
+            engine.events.unsubscribe(engine.message_log.add_event)
+        self.handler = input_handlers.MainGameEventHandler(engine)
+        self.position = position
+
+    @property
+    def finished(self)->bool:
+        return self.position >= len(self.entries)
+
+    def step(self)->None:
+        """Apply the next entry of the journal."""
+        line = self.entries[self.position]
+        if line.startswith("level "):
+            getattr(self.engine.player.level, f"increase_{line.split()[1]}")()
+        else:
+            self.handler.handle_action(decode_action(line, self.engine.player))
+        self.position += 1
+        if self.checkpoint_every and self.position % self.checkpoint_every == 0:
+            self.checkpoints.setdefault(self.position, pickle.dumps(self.engine))
+
+    def seek(self, position: int)->None:
+        """Move to just after the first position entries, from the nearest checkpoint."""
+        position = min(position, len(self.entries))
+        if position < self.position:
+            self._restart()
+        start = max(
+            (checkpoint for checkpoint in self.checkpoints if self.position < checkpoint <= position),
+            default = None,
+        )
+        if start is not None:
+            self._set_engine(pickle.loads(self.checkpoints[start]), start)
+        while self.position < position:
+            self.step()
+
+    def run(self)->None:
+        """Fast-forward to the end of the journal."""
+        self.seek(len(self.entries))
+
+def main()->None:
+    parser = argparse.ArgumentParser(description = "Replay a game journal without a window.")
+    parser.add_argument("journal", help = "Journal file to replay.")
+    parser.add_argument("--to", type = int, default = None, help = "Stop after this many entries.")
+    parser.add_argument("--checkpoint-every", type = int, default = None, help = "Snapshot the game every N entries.")
+    args = parser.parse_args()
+
+    replay = Replay(args.journal, checkpoint_every = args.checkpoint_every)
+    start = time.perf_counter()
+    replay.seek(len(replay.entries) if args.to is None else args.to)
+    seconds = time.perf_counter() - start
+
+    engine = replay.engine
+    print(
+        f"Replayed {replay.position} of {len(replay.entries)} entries in {seconds:.2f}s. "
+        f"Floor {engine.game_world.current_floor}, "
+        f"hp {engine.player.fighter.hp}/{engine.player.fighter.max_hp}, "
+        f"{'alive' if engine.player.is_alive else 'dead'}."
+    )
+
+
+if __name__=="__main__":
+    main()
@@ -0,0 +1,308 @@
+#! /usr/bin/env python3
+"""Load test server.py with many synthetic bot clients.
+
+Each bot connects over TCP, sends a stream of keypresses the way a player
+would (mostly movement, with the odd inventory check and stairs attempt)
+and times how long the server takes to answer each one. The server's
+memory is sampled while the test runs. Used to size hosts and to catch
+latency regressions in the enemy phase.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from ansi_renderer import FRAME_END
+import input_handlers
+from server import ESCAPE_SEQUENCES, TELNET_CHARACTER_MODE
+from timing import process_memory
+
+def move_inputs()->List[bytes]:
+    """The bytes a telnet client may send for each movement key the server understands,
+    including every escape sequence that maps to one.
+    """
+    inputs = [
+        b"\x1b" + sequence for sequence, sym in ESCAPE_SEQUENCES.items()
+        if sym in input_handlers.MOVE_KEYS
+    ]
+    for sym in input_handlers.MOVE_KEYS:
+        if sym < 0x80 and chr(sym).isalpha():
+            inputs.append(bytes([sym]))
+    return inputs
+
+MOVE_INPUTS = move_inputs()
+
+# What bots do with each input, and how often.
+ACTIONS = {
+    "move": 85,
+    "wait": 5,
+    "inventory": 5,
+    "stairs": 5,
+}
+
+class LoadReport:
+    """Latencies and memory samples collected during a load test."""
+
+    def __init__(self)->None:
+        self.latencies: List[float] = [] # Seconds from sending a key to the end of the frame sent back.
+        self.connect_times: List[float] = [] # Seconds from connecting to the first frame.
+        self.memory: List[Tuple[float, Optional[int]]] = [] # (elapsed seconds, server RSS in bytes)
+        self.inputs = 0
+        self.stalls = 0 # Inputs that got no answer, normally because the bot's player died.
+        self.sessions = 0
+        self.errors = 0
+
+    def summary(self)->Dict:
+        latency_ms = sorted(t * 1000 for t in self.latencies)
+        connect_ms = sorted(t * 1000 for t in self.connect_times)
+        memory_mb = [rss / 2**20 for _, rss in self.memory if rss is not None]
+
+        def percentile(values: List[float], fraction: float)->Optional[float]:
+            return values[min(len(values) - 1, int(len(values) * fraction))] if values else None
+
+        return {
+            "sessions": self.sessions,
+            "inputs": self.inputs,
+            "answered": len(latency_ms),
+            "stalls": self.stalls,
+            "errors": self.errors,
+            "latency_ms_p50": percentile(latency_ms, 0.50),
+            "latency_ms_p90": percentile(latency_ms, 0.90),
+            "latency_ms_p99": percentile(latency_ms, 0.99),
+            "latency_ms_max": latency_ms[-1] if latency_ms else None,
+            "latency_ms_mean": statistics.fmean(latency_ms) if latency_ms else None,
+            "connect_ms_p50": percentile(connect_ms, 0.50),
+            "connect_ms_max": connect_ms[-1] if connect_ms else None,
+            "memory_mb_start": memory_mb[0] if memory_mb else None,
+            "memory_mb_peak": max(memory_mb) if memory_mb else None,
+            "memory_mb_end": memory_mb[-1] if memory_mb else None,
+            "memory_samples": [
+                (round(elapsed, 1), rss and round(rss / 2**20, 1)) for elapsed, rss in self.memory
+            ],
+        }
+
+class BotClient:
+    """One synthetic player connected to the server."""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        report: LoadReport,
+        rng: random.Random,
+        *,
+        think_time: float,
+        stall_timeout: float,
+    ):
+        self.host = host
+        self.port = port
+        self.report = report
+        self.rng = rng
+        self.think_time = think_time
+        self.stall_timeout = stall_timeout
+        # Set when a whole frame has arrived, and when the connection closes.
+        self.received = asyncio.Event()
+        self.received_at = 0.0
+        # Set unless part of a frame has arrived and the rest has not.
+        self.frame_finished = asyncio.Event()
+        self.frame_finished.set()
+
+    async def read_frames(self, reader: asyncio.StreamReader)->None:
+        """Note when whole frames have arrived. The frames themselves are thrown away."""
+        frame_end = FRAME_END.encode()
+        tail = b""
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                break
+            if data.startswith(TELNET_CHARACTER_MODE):
+                data = data[len(TELNET_CHARACTER_MODE):]
+            if not data:
+                continue
+            # The end of a frame may itself be split between reads.
+            tail = (tail + data)[-len(frame_end):]
+            if tail == frame_end:
+                self.received_at = time.perf_counter()
+                self.frame_finished.set()
+                self.received.set()
+            else:
+                self.frame_finished.clear()
+        self.frame_finished.set()
+        self.received.set()
+
+    async def send(self, writer: asyncio.StreamWriter, data: bytes)->Optional[float]:
+        """Send a key and return the seconds until the server finished answering
+        with a frame, or None.
+        """
+        # Let the rest of any earlier frame arrive first, so it is not taken for the answer.
+        try:
+            await asyncio.wait_for(self.frame_finished.wait(), self.stall_timeout)
+        except asyncio.TimeoutError:
+            pass
+        self.received.clear()
+        sent_at = time.perf_counter()
+        writer.write(data)
+        await writer.drain()
+        self.report.inputs += 1
+        try:
+            await asyncio.wait_for(self.received.wait(), self.stall_timeout)
+        except asyncio.TimeoutError:
+            self.report.stalls += 1
+            return None
+        latency = self.received_at - sent_at
+        self.report.latencies.append(latency)
+        return latency
+
+    def next_inputs(self)->List[bytes]:
+        action = self.rng.choices(list(ACTIONS), weights = list(ACTIONS.values()))[0]
+        if action == "move":
+            return [self.rng.choice(MOVE_INPUTS)]
+        if action == "wait":
+            return [b"."]
+        if action == "inventory":
+            return [b"i", b"\x1b"]
+        return [b">"]
+
+    async def play_session(self, deadline: float)->None:
+        """Play one game until the deadline, or until the player seems to have died."""
+        connected_at = time.perf_counter()
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        self.report.sessions += 1
+        reader_task = asyncio.create_task(self.read_frames(reader))
+        try:
+            self.received.clear()
+            await asyncio.wait_for(self.received.wait(), self.stall_timeout)
+            self.report.connect_times.append(self.received_at - connected_at)
+            while time.perf_counter() < deadline and not reader_task.done():
+                for data in self.next_inputs():
+                    if await self.send(writer, data) is None:
+                        # Nothing is drawn for keys on the game over screen.
+                        writer.write(b"\x1b")
+                        await writer.drain()
+                        return
+                await asyncio.sleep(self.rng.uniform(0.5, 1.5) * self.think_time)
+        finally:
+            writer.close()
+            reader_task.cancel()
+
+    async def run(self, deadline: float)->None:
+        while time.perf_counter() < deadline:
+            try:
+                await self.play_session(deadline)
+            except (ConnectionError, asyncio.TimeoutError):
+                self.report.errors += 1
+                await asyncio.sleep(self.think_time)
+
+async def sample_memory(pid: int, report: LoadReport, interval: float)->None:
+    start = time.perf_counter()
+    while True:
+        report.memory.append((time.perf_counter() - start, process_memory(pid)))
+        await asyncio.sleep(interval)
+
+async def run_load_test(
+    host: str,
+    port: int,
+    *,
+    clients: int = 100,
+    duration: float = 60.0,
+    ramp_up: float = 10.0,
+    think_time: float = 0.25,
+    stall_timeout: float = 5.0,
+    server_pid: Optional[int] = None,
+    memory_interval: float = 1.0,
+    seed: int = 0,
+)->LoadReport:
+    """Connect clients bots over ramp_up seconds and let them play until duration has passed."""
+    report = LoadReport()
+    deadline = time.perf_counter() + duration
+    sampler = None
+    if server_pid is not None:
+        sampler = asyncio.create_task(sample_memory(server_pid, report, memory_interval))
+
+    async def start_bot(index: int)->None:
+        await asyncio.sleep(ramp_up * index / clients)
+        bot = BotClient(
+            host, port, report, random.Random(seed * 100003 + index),
+            think_time = think_time, stall_timeout = stall_timeout,
+        )
+        await bot.run(deadline)
+
+    await asyncio.gather(*(start_bot(index) for index in range(clients)))
+    if sampler:
+        sampler.cancel()
+        report.memory.append((duration, process_memory(server_pid)))
+    return report
+
+def start_server(port: int, workers: int)->subprocess.Popen:
+    """Run server.py in a child process and wait until it accepts connections."""
+    server = subprocess.Popen(
+        [sys.executable, "server.py", "--port", str(port), "--workers", str(workers)],
+        cwd = os.path.dirname(os.path.abspath(__file__)),
+        stdout = subprocess.DEVNULL,
+    )
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout = 1).close()
+            return server
+        except OSError:
+            if server.poll() is not None:
+                raise RuntimeError("server.py exited during startup")
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("server.py did not start listening")
+
+def main()->None:
+    parser = argparse.ArgumentParser(description = "Load test server.py with synthetic bot clients.")
+    parser.add_argument("--host", default = "127.0.0.1", help = "Server to connect to.")
+    parser.add_argument("--port", type = int, default = 8023, help = "Server port.")
+    parser.add_argument("--spawn-server", action = "store_true", help = "Start server.py on --port for the test.")
+    parser.add_argument("--server-workers", type = int, default = 4, help = "Worker threads for a spawned server.")
+    parser.add_argument("--server-pid", type = int, default = None, help = "Sample this process's memory.")
+    parser.add_argument("--clients", type = int, default = 100, help = "Number of bot clients.")
+    parser.add_argument("--duration", type = float, default = 60.0, help = "Seconds to run for.")
+    parser.add_argument("--ramp-up", type = float, default = 10.0, help = "Seconds over which clients connect.")
+    parser.add_argument("--think-ms", type = float, default = 250.0, help = "Mean pause between a bot's keys.")
+    parser.add_argument("--seed", type = int, default = 0, help = "Seed for the bots' choices.")
+    parser.add_argument("--output", default = None, help = "Write the report to this JSON file.")
+    args = parser.parse_args()
+
+    server = None
+    server_pid = args.server_pid
+    if args.spawn_server:
+        server = start_server(args.port, args.server_workers)
+        server_pid = server.pid
+    try:
+        report = asyncio.run(run_load_test(
+            args.host,
+            args.port,
+            clients = args.clients,
+            duration = args.duration,
+            ramp_up = args.ramp_up,
+            think_time = args.think_ms / 1000,
+            server_pid = server_pid,
+            seed = args.seed,
+        ))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    summary = report.summary()
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent = 2)
+    summary.pop("memory_samples")
+    print(json.dumps(summary, indent = 2))
+
+
+if __name__=="__main__":
+    main()
@@ -1,5 +1,8 @@
 #! /usr/bin/env python3
+import argparse
+import time
 import traceback
+from typing import Optional
 
 import tcod
 
@@ -7,6 +10,7 @@ import setup_game
 import exceptions
 import input_handlers
 import color
+import timing
 
 def save_game(handler: input_handlers.BaseEventHandler, filename: str)->None:
     """If the current event handler has an active Engine then save it."""
@@ -15,13 +19,27 @@ def save_game(handler: input_handlers.BaseEventHandler, filename: str)->None:
         print("Game saved.")
 
 def main() -> None:
+    parser = argparse.ArgumentParser(description = "Play the game.")
+    parser.add_argument(
+        "--profile", nargs = "?", const = "main.prof", default = None,
+        help = "Profile the game and write the stats to this file, main.prof by default.",
+    )
+    parser.add_argument("--timings", action = "store_true", help = "Print turn phase timings on exit.")
+    parser.add_argument("--max-messages", type = int, default = 1000, help = "Messages kept in memory by new games.")
+    parser.add_argument("--message-spill", default = None, help = "Append messages dropped from memory to this file.")
+    args = parser.parse_args()
+
+    with timing.profiled(args.profile):
+        run(timings = args.timings, max_messages = args.max_messages, message_spill = args.message_spill)
+
+def run(timings: bool = False, max_messages: int = 1000, message_spill: Optional[str] = None) -> None:
     screen_width = 80
     screen_height = 50
 
     tileset = tcod.tileset.load_tilesheet("assets/dejavu10x10_gs_tc.png",
                                           32, 8, tcod.tileset.CHARMAP_TCOD)
 
-    handler: input_handlers.BaseEventHandler = setup_game.MainMenu()
+    handler: input_handlers.BaseEventHandler = setup_game.MainMenu(max_messages, message_spill)
 
     with tcod.context.new_terminal(screen_width,
                                    screen_height,
@@ -31,14 +49,26 @@ def main() -> None:
         root_console = tcod.Console(screen_width, screen_height, order = "F")
         try:
             while True:
-                root_console.clear()
-                handler.on_render(console = root_console)
-                context.present(root_console)
+                if handler.redraw:
+                    start = time.perf_counter()
+                    root_console.clear()
+                    handler.on_render(console = root_console)
+                    rendered = time.perf_counter()
+                    context.present(root_console)
+                    if isinstance(handler, input_handlers.EventHandler):
+                        handler.engine.timers.add("render", rendered - start)
+                        handler.engine.timers.add("present", time.perf_counter() - rendered)
+                    handler.redraw = False
 
                 try:
+                    # Handle every queued event before drawing again, so bursts
+                    # such as mouse motion floods cost a single frame.
                     for event in tcod.event.wait():
                         context.convert_event(event)
-                        handler = handler.handle_events(event)
+                        next_handler = handler.handle_events(event)
+                        if next_handler is not handler:
+                            next_handler.redraw = True
+                        handler = next_handler
                 except Exception:
                     traceback.print_exc()
                     if isinstance(handler, input_handlers.EventHandler):
@@ -51,6 +81,11 @@ def main() -> None:
         except BaseException:
             save_game(handler,"savegame.sav")
             raise
+        finally:
+            if isinstance(handler, input_handlers.EventHandler):
+                if timings:
+                    print(handler.engine.timers.report())
+                handler.engine.close()
 
 
 if __name__=="__main__":
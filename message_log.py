@@ -1,16 +1,35 @@
-from typing import Iterable, List, Reversible, Tuple
+from collections import deque
+from typing import Deque, Dict, IO, Iterable, Iterator, List, Optional, Tuple
+import itertools
 import textwrap
 
 import tcod
 
 import color
+from game_events import GameEvent
 
 
 class Message:
-    def __init__(self, text: str, fg: Tuple[int,int,int]):
-        self.plain_text = text
+    def __init__(self, text: Optional[str], fg: Tuple[int,int,int], event: Optional[GameEvent] = None):
+        """A message is given either its text, or the event its text is formatted from when needed."""
+        self._text = text
+        self.event = event
         self.fg = fg
         self.count = 1
+        # Wrapped lines by width, valid for _wrapped_count stacked copies.
+        self._wrapped: Dict[int, List[str]] = {}
+        self._wrapped_count = self.count
+
+    def __getstate__(self)->Dict:
+        state = self.__dict__.copy()
+        state["_wrapped"] = {}
+        return state
+
+    @property
+    def plain_text(self)->str:
+        if self._text is None:
+            self._text = self.event.describe()
+        return self._text
 
     @property
     def full_text(self)->str:
@@ -18,20 +37,80 @@ class Message:
             return f"{self.plain_text} (x{self.count})"
         return self.plain_text
 
+    def wrapped(self, width: int)->List[str]:
+        """Return full_text wrapped to width, reusing earlier results."""
+        if self._wrapped_count != self.count:
+            self._wrapped = {}
+            self._wrapped_count = self.count
+        lines = self._wrapped.get(width)
+        if lines is None:
+            lines = self._wrapped[width] = list(MessageLog.wrap(self.full_text, width))
+        return lines
+
 class MessageLog:
-    def __init__(self)->None:
-        self.messages: List[Message] = []
+    def __init__(self, max_messages: int = 1000, spill_filename: Optional[str] = None)->None:
+        """Keep at most max_messages in memory.
+        Older messages are dropped, or appended to spill_filename if one is given.
+        """
+        self.max_messages = max_messages
+        self.spill_filename = spill_filename
+        # Opened on the first spill and kept open. Not saved with the game.
+        self._spill_file: Optional[IO[str]] = None
+        self.messages: Deque[Message] = deque()
+        # Bumped on every change, so renderers can tell when the log needs redrawing.
+        self.version = 0
+
+    def __getstate__(self)->Dict:
+        """Saves keep the spill filename, and append to it again once loaded."""
+        state = self.__dict__.copy()
+        state["_spill_file"] = None
+        return state
 
     def add_message(
         self, text: str, fg: Tuple[int,int,int] = color.white,*, stack: bool = True
     )->None:
-        if stack and self.messages and text == self.messages[-1].plain_text:
+        if stack and self.messages and self.messages[-1].event is None and text == self.messages[-1].plain_text:
+            self.messages[-1].count+=1
+        else:
+            self.append(Message(text,fg))
+        self.version += 1
+
+    def add_event(self, event: GameEvent)->None:
+        """Log a game event. Its text is only formatted once it is rendered."""
+        if self.messages and self.messages[-1].event == event:
             self.messages[-1].count+=1
         else:
-            self.messages.append(Message(text,fg))
+            self.append(Message(None, event.fg, event))
+        self.version += 1
+
+    def append(self, message: Message)->None:
+        if len(self.messages) >= self.max_messages:
+            self.spill(self.messages.popleft())
+        self.messages.append(message)
+
+    def spill(self, message: Message)->None:
+        """Write a message evicted from memory to the spill file, if there is one."""
+        if self.spill_filename is None:
+            return
+        if self._spill_file is None:
+            self._spill_file = open(self.spill_filename, "a", encoding = "utf-8")
+        self._spill_file.write(message.full_text.replace("\n", " ") + "\n")
+
+    def close(self)->None:
+        """Close the spill file. It is reopened if more messages spill."""
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+
+    def newest_first(self, newest: Optional[int] = None)->Iterator[Message]:
+        """Iterate from the message at index newest back to the oldest one kept,
+        without copying the log. Defaults to starting at the latest message.
+        """
+        skip = 0 if newest is None else len(self.messages) - 1 - newest
+        return itertools.islice(reversed(self.messages), skip, None)
 
     def render(self, console: tcod.Console, x: int, y: int, width: int, height: int) -> None:
-        self.render_messages(console,x,y,width,height, self.messages)
+        self.render_messages(console,x,y,width,height, self.newest_first())
 
     @staticmethod
     def wrap(string: str, width: int)->Iterable[str]:
@@ -46,11 +125,12 @@ class MessageLog:
         y: int,
         width: int,
         height: int,
-        messages: Reversible[Message],
+        messages: Iterable[Message],
     ) -> None:
+        """Render messages, given newest first, upwards from the bottom of the area."""
         y_offset = height - 1
-        for message in reversed(messages):
-            for line in reversed(list(cls.wrap(message.full_text,width))):
+        for message in messages:
+            for line in reversed(message.wrapped(width)):
                 console.print(x=x,y=y+y_offset, string = line, fg = message.fg)
                 y_offset-=1
                 if y_offset < 0:
@@ -1,8 +1,8 @@
 from __future__ import annotations
 from typing import Dict, Iterator,List,Tuple,TYPE_CHECKING
-import random
 import tcod
 
+from entity import Actor
 from game_map import GameMap
 import tile_types
 import entity_factories
@@ -10,6 +10,7 @@ import entity_factories
 if TYPE_CHECKING:
     from engine import Engine
     from entity import Entity
+    from rng import RandomStream
 
 max_items_by_floor = [
     (1,1),
@@ -52,6 +53,7 @@ def get_entities_at_random(
     weighted_chance_by_floor: Dict[int, List[Tuple[Entity,int]]],
     number_of_entities: int,
     floor: int,
+    rng: RandomStream,
 )->List[Entity]:
     entity_weighted_chances = {}
 
@@ -65,7 +67,7 @@ def get_entities_at_random(
                 entity_weighted_chances[entity] = weighted_chance
     entities = list(entity_weighted_chances.keys())
     entity_weighted_chances_values = list(entity_weighted_chances.values())
-    chosen_entities = random.choices(
+    chosen_entities = rng.choices(
         entities, weights = entity_weighted_chances_values, k = number_of_entities,
     )
     return chosen_entities
@@ -97,29 +99,32 @@ def place_entities(
     room: RectangularRoom,
     dungeon: GameMap,
     floor_number: int,
+    rng: RandomStream,
     ) -> None:
-    number_of_monsters = random.randint(0,get_max_value_for_floor(max_monsters_by_floor,floor_number))
-    number_of_items = random.randint(0,get_max_value_for_floor(max_items_by_floor,floor_number))
+    number_of_monsters = rng.randint(0,get_max_value_for_floor(max_monsters_by_floor,floor_number))
+    number_of_items = rng.randint(0,get_max_value_for_floor(max_items_by_floor,floor_number))
 
     monsters: List[Entity] = get_entities_at_random(
-        enemy_chances, number_of_monsters, floor_number
+        enemy_chances, number_of_monsters, floor_number, rng
     )
     items: List[Entity] = get_entities_at_random(
-        item_chances, number_of_items, floor_number
+        item_chances, number_of_items, floor_number, rng
     )
 
     for entity in monsters + items:
-        x = random.randint(room.x1 + 1,room.x2 - 1)
-        y = random.randint(room.y1 + 1,room.y2 - 1)
+        x = rng.randint(room.x1 + 1,room.x2 - 1)
+        y = rng.randint(room.y1 + 1,room.y2 - 1)
         if (not any(entity.x == x and entity.y ==y for entity in dungeon.entities)) and (not (x ,y)== dungeon.upstairs_location):
-            entity.spawn(dungeon,x,y)
+            spawned = entity.spawn(dungeon,x,y)
+            if isinstance(spawned, Actor):
+                spawned.fighter.roll_hp(rng)
 
-def tunnel_between(start: Tuple[int,int],end: Tuple[int,int])->Iterator[Tuple[int,int]]:
+def tunnel_between(start: Tuple[int,int],end: Tuple[int,int], rng: RandomStream)->Iterator[Tuple[int,int]]:
     """Return an L-shaped tunnel between start and end"""
     x1,y1 = start
     x2,y2 = end
 
-    if random.random()<0.5:
+    if rng.random()<0.5:
         corner_x,corner_y = x2,y1
     else:
         corner_x,corner_y = x1,y2
@@ -136,16 +141,18 @@ def generate_dungeon(max_rooms: int,
                     map_height: int,
                     engine: Engine)->GameMap:
     player = engine.player
+    # Each floor has its own stream, so floors are the same whatever order they are generated in.
+    rng = engine.rng.stream("procgen", engine.game_world.current_floor)
     dungeon = GameMap(engine,map_width,map_height,entities = [player])
     rooms: List[RectangularRoom] = []
 
     center_of_last_room = (0,0)
     for r in range(max_rooms):
-        room_width = random.randint(room_min_size,room_max_size)
-        room_height = random.randint(room_min_size,room_max_size)
+        room_width = rng.randint(room_min_size,room_max_size)
+        room_height = rng.randint(room_min_size,room_max_size)
 
-        x = random.randint(0,map_width - room_width - 1)
-        y = random.randint(0,map_height - room_height - 1)
+        x = rng.randint(0,map_width - room_width - 1)
+        y = rng.randint(0,map_height - room_height - 1)
 
         new_room = RectangularRoom(x,y,room_width,room_height)
         if any(new_room.intersects(other_room) for other_room in rooms):
@@ -155,13 +162,13 @@ def generate_dungeon(max_rooms: int,
         if len(rooms)==0:
             pass
         else:
-            for x,y in tunnel_between(new_room.center,rooms[-1].center):
+            for x,y in tunnel_between(new_room.center,rooms[-1].center,rng):
                 dungeon.tiles[x,y] = tile_types.floor
             center_of_last_room = new_room.center
         rooms.append(new_room)
 
     for room in rooms:
-        place_entities(room,dungeon,engine.game_world.current_floor)
+        place_entities(room,dungeon,engine.game_world.current_floor,rng)
 
     dungeon.downstairs_location = center_of_last_room
     dungeon.tiles[center_of_last_room] = tile_types.down_stairs
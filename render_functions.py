@@ -3,6 +3,7 @@ from __future__ import annotations
 from typing import Tuple, TYPE_CHECKING
 
 import color
+from timing import process_memory
 
 if TYPE_CHECKING:
     from tcod import Console
@@ -12,7 +13,14 @@ if TYPE_CHECKING:
 def get_names_at_location(x: int, y: int, game_map: GameMap)->str:
     if not game_map.in_bounds(x,y) or not game_map.visible[x,y]:
         return ""
-    names = ", ".join(entity.name for entity in game_map.entities if entity.x == x and entity.y == y)
+    names = ", ".join(
+        [decoration.name for decoration in game_map.decorations if decoration.x == x and decoration.y == y]
+        + [item.name for item in game_map.items_at(x,y)]
+        + [
+            actor.name for actors in (game_map.dead_actors, game_map.actors)
+            for actor in actors if actor.x == x and actor.y == y
+        ]
+    )
 
     return names.capitalize()
 
@@ -49,3 +57,31 @@ def render_names_at_mouse_location(
     names_at_mouse_location = get_names_at_location(x=mouse_x, y=mouse_y,game_map=engine.game_map)
 
     console.print(x=x,y=y,string=names_at_mouse_location)
+
+def render_performance_overlay(console: Console, x: int, y: int, engine: Engine)->None:
+    """Draw the latest timings and counters from the engine in a box at x, y."""
+    timers = engine.timers
+    counters = engine.counters.last_turn
+    game_map = engine.game_map
+    memory = process_memory()
+
+    frame_ms = (timers["render"].last + timers["present"].last) * 1000
+    turn_ms = (timers["action"].last + timers["enemies"].last + timers["fov"].last) * 1000
+    lines = [
+        f"Frame: {frame_ms:7.2f} ms",
+        f"Turn:  {turn_ms:7.2f} ms",
+        f" action  {timers['action'].last * 1000:7.2f} ms",
+        f" enemies {timers['enemies'].last * 1000:7.2f} ms",
+        f" fov     {timers['fov'].last * 1000:7.2f} ms",
+        f"Actors: {counters['actors']} active/{len(game_map.actors) + len(game_map.dead_actors)} total",
+        f"Corpses: {len(game_map.decorations)}",
+        f"Paths/turn: {counters['paths']}",
+        f"FOV/turn: {counters['fov']}",
+        f"Memory: {memory / 2**20:.1f} MB" if memory is not None else "Memory: n/a",
+    ]
+    console.draw_frame(
+        x = x, y = y, width = 28, height = len(lines) + 2,
+        title = "Performance", fg = color.white, bg = color.black,
+    )
+    for i, line in enumerate(lines):
+        console.print(x = x + 1, y = y + 1 + i, string = line, fg = color.white)
@@ -0,0 +1,82 @@
+"""Seeded random number streams for a game session.
+
+Every subsystem, and every floor for dungeon generation, draws from its own
+independent stream derived from the game seed. The same seed therefore
+always reproduces the same game, whatever order or process the streams are
+used in.
+"""
+from __future__ import annotations
+
+from bisect import bisect
+from itertools import accumulate
+from typing import Dict, Optional, Sequence, Tuple, TypeVar
+import zlib
+
+import numpy as np
+
+T = TypeVar("T")
+
+
+class RandomStream:
+    """One independent stream, backed by a NumPy Generator.
+    Uniform floats are drawn in batches and handed out one at a time, which
+    keeps per-roll overhead low on hot paths such as combat dice.
+    """
+
+    def __init__(self, seed_sequence: np.random.SeedSequence, batch_size: int = 256):
+        self.generator = np.random.default_rng(seed_sequence)
+        self.batch_size = batch_size
+        self._buffer = np.empty(0)
+        self._next = 0
+
+    def __getstate__(self)->Dict:
+        """Only save the unused part of the buffer."""
+        state = self.__dict__.copy()
+        state["_buffer"] = self._buffer[self._next:]
+        state["_next"] = 0
+        return state
+
+    def random(self)->float:
+        """Return a float in [0, 1)."""
+        if self._next >= len(self._buffer):
+            self._buffer = self.generator.random(self.batch_size)
+            self._next = 0
+        value = self._buffer[self._next]
+        self._next += 1
+        return float(value)
+
+    def randint(self, a: int, b: int)->int:
+        """Return an integer N with a <= N <= b."""
+        return a + int(self.random() * (b - a + 1))
+
+    def roll(self, number: int, size: int)->int:
+        """Return the total of number dice with size sides each."""
+        return sum(self.randint(1,size) for _ in range(number))
+
+    def choice(self, seq: Sequence[T])->T:
+        return seq[int(self.random() * len(seq))]
+
+    def choices(self, population: Sequence[T], weights: Sequence[float], k: int = 1)->list[T]:
+        cum_weights = list(accumulate(weights))
+        total = cum_weights[-1]
+        return [population[bisect(cum_weights, self.random() * total)] for _ in range(k)]
+
+class GameRNG:
+    """The random streams of one game, created on first use."""
+
+    def __init__(self, seed: Optional[int] = None):
+        if seed is None:
+            seed = np.random.SeedSequence().entropy
+        self.seed = seed
+        self._streams: Dict[Tuple, RandomStream] = {}
+
+    def stream(self, name: str, *keys: int)->RandomStream:
+        """Return the stream for a subsystem, e.g. stream("combat") or stream("procgen", floor)."""
+        key = (name, *keys)
+        stream = self._streams.get(key)
+        if stream is None:
+            spawn_key = (zlib.crc32(name.encode()), *keys)
+            stream = self._streams[key] = RandomStream(
+                np.random.SeedSequence(self.seed, spawn_key = spawn_key)
+            )
+        return stream
@@ -0,0 +1,166 @@
+"""Synthetic floors for scaling and stress tests.
+
+Real floors never hold more than a handful of monsters, because
+procgen caps population per room. A Scenario builds an engine whose only
+floor has whatever size, population and layout a test needs:
+
+    engine = Scenario(width = 320, height = 180, monster_density = 0.02, corpses = 500).build()
+
+Densities are fractions of the walkable tiles. Everything is drawn from
+the engine's seeded streams, so the same scenario always builds the same floor.
+"""
+from __future__ import annotations
+
+import copy
+from typing import List, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+from engine import Engine
+from entity import Actor
+import entity_factories
+from game_map import GameMap, GameWorld
+from procgen import RectangularRoom, tunnel_between
+import tile_types
+
+if TYPE_CHECKING:
+    from rng import RandomStream
+
+MONSTERS = [entity_factories.goblin, entity_factories.orc, entity_factories.troll]
+ITEMS = [
+    entity_factories.health_potion,
+    entity_factories.lightning_scroll,
+    entity_factories.confusion_scroll,
+    entity_factories.sword,
+]
+
+# "open" is one room filling the map. "closed" is rooms joined by corridors, like a real floor.
+LAYOUTS = ("open", "closed")
+
+class Scenario:
+    """Settings for a synthetic floor. build() makes a fresh engine from them each time."""
+
+    def __init__(
+        self,
+        *,
+        width: int = 80,
+        height: int = 43,
+        monster_density: float = 0.01,
+        item_density: float = 0.005,
+        corpses: int = 0,
+        layout: str = "open",
+        immortal_player: bool = False,
+        seed: int = 0,
+    ):
+        if layout not in LAYOUTS:
+            raise ValueError(f"Unknown layout {layout!r}, expected one of {LAYOUTS}.")
+        self.width = width
+        self.height = height
+        self.monster_density = monster_density
+        self.item_density = item_density
+        self.corpses = corpses
+        self.layout = layout
+        # Keeps benchmarks and soak tests from ending early.
+        self.immortal_player = immortal_player
+        self.seed = seed
+
+    def build(self)->Engine:
+        """Return a new engine with the scenario's floor as its first floor."""
+        player = copy.deepcopy(entity_factories.player)
+        engine = Engine(player = player, seed = self.seed)
+        player.fighter.roll_hp(engine.rng.stream("player"))
+        if self.immortal_player:
+            player.fighter.max_hp = player.fighter.hp = 10**6
+        engine.game_world = GameWorld(
+            engine = engine,
+            map_width = self.width,
+            map_height = self.height,
+            max_rooms = 30,
+            room_min_size = 6,
+            room_max_size = 10,
+            max_floor = 1,
+        )
+        rng = engine.rng.stream("scenario")
+        # Room for every corpse asked for, so the cap does not quietly shrink the scenario.
+        game_map = GameMap(
+            engine, self.width, self.height, max_corpses = max(GameMap.max_corpses, self.corpses)
+        )
+        if self.layout == "open":
+            game_map.tiles[1:-1,1:-1] = tile_types.floor
+            start = (self.width // 2, self.height // 2)
+            end = (self.width - 2, self.height - 2)
+        else:
+            start, end = self.dig_rooms(game_map, rng)
+        game_map.upstairs_location = start
+        game_map.downstairs_location = end
+        game_map.tiles[end] = tile_types.down_stairs
+        player.place(*start, game_map)
+        engine.game_map = game_map
+        engine.game_world.game_levels.append(game_map)
+
+        free = self.free_tiles(game_map)
+        monsters = int(len(free) * self.monster_density)
+        items = int(len(free) * self.item_density)
+        for prototypes, count in ((MONSTERS, monsters + self.corpses), (ITEMS, items)):
+            for _ in range(min(count, len(free))):
+                x, y = free.pop(rng.randint(0, len(free) - 1))
+                spawned = rng.choice(prototypes).spawn(game_map, x, y)
+                if isinstance(spawned, Actor):
+                    spawned.fighter.roll_hp(rng)
+        self.kill(engine, self.corpses)
+
+        engine.update_fov()
+        return engine
+
+    def dig_rooms(self, game_map: GameMap, rng: RandomStream)->Tuple[Tuple[int,int],Tuple[int,int]]:
+        """Carve rooms joined by tunnels, as many as fit in the map.
+        Returns the centers of the first and last rooms.
+        """
+        rooms: List[RectangularRoom] = []
+        attempts = 30 * (self.width * self.height) // (80 * 43)
+        for _ in range(max(attempts, 30)):
+            room_width = rng.randint(6, 10)
+            room_height = rng.randint(6, 10)
+            x = rng.randint(0, self.width - room_width - 1)
+            y = rng.randint(0, self.height - room_height - 1)
+            room = RectangularRoom(x, y, room_width, room_height)
+            if any(room.intersects(other) for other in rooms):
+                continue
+            game_map.tiles[room.inner] = tile_types.floor
+            if rooms:
+                for tunnel_x, tunnel_y in tunnel_between(room.center, rooms[-1].center, rng):
+                    game_map.tiles[tunnel_x, tunnel_y] = tile_types.floor
+            rooms.append(room)
+        return rooms[0].center, rooms[-1].center
+
+    @staticmethod
+    def free_tiles(game_map: GameMap)->List[Tuple[int,int]]:
+        """Walkable tiles that are not the stairs and that nothing stands on."""
+        walkable = game_map.tiles["walkable"].copy()
+        for x, y in (game_map.upstairs_location, game_map.downstairs_location):
+            walkable[x, y] = False
+        for entity in game_map.entities:
+            walkable[entity.x, entity.y] = False
+        return [(int(x), int(y)) for x, y in np.argwhere(walkable)]
+
+    @staticmethod
+    def kill(engine: Engine, count: int)->None:
+        """Turn the last count monsters spawned into corpses, the same way combat does,
+        without logging it or giving the player the experience.
+        """
+        if not count:
+            return
+        player = engine.player
+        victims = [actor for actor in engine.game_map.actors if actor is not player][-count:]
+        engine.events.unsubscribe(engine.message_log.add_event)
+        current_xp = player.level.current_xp
+        for actor in victims:
+            actor.fighter.die()
+        player.level.current_xp = current_xp
+        engine.events.subscribe(engine.message_log.add_event)
+
+    def __str__(self)->str:
+        return (
+            f"{self.width}x{self.height} {self.layout}, monster density {self.monster_density}, "
+            f"item density {self.item_density}, {self.corpses} corpses"
+        )
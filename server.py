@@ -0,0 +1,395 @@
+#! /usr/bin/env python3
+"""Host many games in one process over a telnet style TCP protocol.
+
+Each connection gets its own Engine, driven through the normal event
+handlers and rendered to an off-screen console. Game steps run in a thread
+pool, one at a time per session, so a slow enemy phase in one game does
+not hold up the others. Sessions left idle are hibernated to disk and
+restored on their next input.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import itertools
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+import traceback
+from typing import Callable, Deque, Dict, List, Optional
+
+import tcod
+
+from ansi_renderer import AnsiRenderer
+import color
+import input_handlers
+import setup_game
+
+# Seconds to wait for the rest of an escape sequence split across reads.
+ESCAPE_TIMEOUT = 0.05
+
+# Telnet negotiation: the server echoes, and input is sent a character at a time.
+IAC = 0xFF
+TELNET_CHARACTER_MODE = bytes([IAC, 251, 1, IAC, 251, 3])
+
+# Keys sent as CSI (ESC [ parameters final) or SS3 (ESC O final) sequences,
+# without the leading ESC. Sequences not listed here are ignored.
+ESCAPE_SEQUENCES = {
+    b"[A": tcod.event.K_UP,
+    b"[B": tcod.event.K_DOWN,
+    b"[C": tcod.event.K_RIGHT,
+    b"[D": tcod.event.K_LEFT,
+    b"[H": tcod.event.K_HOME,
+    b"[F": tcod.event.K_END,
+    b"[1~": tcod.event.K_HOME,
+    b"[4~": tcod.event.K_END,
+    b"[5~": tcod.event.K_PAGEUP,
+    b"[6~": tcod.event.K_PAGEDOWN,
+    b"OA": tcod.event.K_UP,
+    b"OB": tcod.event.K_DOWN,
+    b"OC": tcod.event.K_RIGHT,
+    b"OD": tcod.event.K_LEFT,
+    b"OH": tcod.event.K_HOME,
+    b"OF": tcod.event.K_END,
+    b"OR": tcod.event.K_F3,
+}
+
+SHIFTED_KEYS = {
+    ">": tcod.event.K_PERIOD,
+    "<": tcod.event.K_COMMA,
+}
+
+def key_event(sym: int, shift: bool = False)->tcod.event.KeyDown:
+    return tcod.event.KeyDown(
+        scancode = 0,
+        sym = sym,
+        mod = tcod.event.KMOD_LSHIFT if shift else 0,
+    )
+
+def escape_sequence_end(data: bytes, start: int)->Optional[int]:
+    """Where the CSI or SS3 sequence starting at data[start], just after an ESC, ends.
+    None if no sequence starts there, so the ESC is a key press of its own.
+    Past the end of data if the sequence is cut off.
+    """
+    introducer = data[start:start+1]
+    if introducer == b"O":
+        return start + 2
+    if introducer != b"[":
+        return None
+    i = start + 1
+    # Parameter and intermediate bytes, then one final byte.
+    while i < len(data) and 0x20 <= data[i] <= 0x3F:
+        i += 1
+    return i + 1
+
+def incomplete_escape_start(data: bytes)->Optional[int]:
+    """Where an escape sequence cut off by the end of data starts, if one is.
+    A lone ESC at the end counts, as it may be the start of a sequence.
+    """
+    start = data.rfind(b"\x1b")
+    if start < 0:
+        return None
+    end = escape_sequence_end(data, start + 1)
+    if start == len(data) - 1 or (end is not None and end > len(data)):
+        return start
+    return None
+
+def parse_input(data: bytes)->List[tcod.event.KeyDown]:
+    """Turn bytes from a client into key events, skipping telnet commands.
+    Escape sequences cut off by the end of data are dropped.
+    """
+    events = []
+    i = 0
+    while i < len(data):
+        byte = data[i]
+        if byte == IAC:
+            i += 3
+            continue
+        if byte == 0x1B:
+            end = escape_sequence_end(data, i + 1)
+            if end is not None:
+                sequence = data[i+1:end]
+                if sequence in ESCAPE_SEQUENCES:
+                    events.append(key_event(ESCAPE_SEQUENCES[sequence]))
+                i = end
+                continue
+            events.append(key_event(tcod.event.K_ESCAPE))
+        elif byte in (0x0D, 0x0A):
+            if byte == 0x0D or not events or events[-1].sym != tcod.event.K_RETURN:
+                events.append(key_event(tcod.event.K_RETURN))
+        elif chr(byte) in SHIFTED_KEYS:
+            events.append(key_event(SHIFTED_KEYS[chr(byte)], shift = True))
+        elif 0x20 <= byte < 0x7F:
+            events.append(key_event(ord(chr(byte).lower())))
+        i += 1
+    return events
+
+class Session:
+    """One player's game, the console it is rendered to, and what their terminal shows."""
+
+    def __init__(self, session_id: int, width: int = 80, height: int = 50):
+        self.session_id = session_id
+        self.width = width
+        self.height = height
+        self.renderer = AnsiRenderer()
+        self.handler: Optional[input_handlers.BaseEventHandler] = input_handlers.MainGameEventHandler(
+            setup_game.new_game()
+        )
+        self.console: Optional[tcod.Console] = tcod.Console(width, height, order = "F")
+        self.finished = False
+        # Held while the session is stepped or hibernated, which happen on worker threads.
+        self.lock = threading.Lock()
+        self.last_input = time.monotonic()
+        # Where the game is saved while hibernating.
+        self.hibernation_filename: Optional[str] = None
+
+    @property
+    def hibernating(self)->bool:
+        return self.hibernation_filename is not None
+
+    def hibernate(self, filename: str)->None:
+        """Save the game to filename and drop everything the session holds in memory.
+        Open menus are closed; the game resumes in the main view.
+        """
+        assert isinstance(self.handler, input_handlers.EventHandler)
+        self.handler.engine.save_as(filename)
+        self.handler.engine.close()
+        self.hibernation_filename = filename
+        self.handler = None
+        self.console = None
+        self.renderer.reset()
+
+    def wake(self)->float:
+        """Restore a hibernated game, returning how many seconds it took."""
+        start = time.perf_counter()
+        engine = setup_game.load_game(self.hibernation_filename)
+        os.remove(self.hibernation_filename)
+        self.hibernation_filename = None
+        self.handler = input_handlers.MainGameEventHandler(engine)
+        self.handler.redraw = True
+        self.console = tcod.Console(self.width, self.height, order = "F")
+        return time.perf_counter() - start
+
+    def close(self)->None:
+        """End the session, removing its hibernation file if it has one."""
+        with self.lock:
+            self.finished = True
+            if isinstance(self.handler, input_handlers.EventHandler):
+                self.handler.engine.close()
+            if self.hibernation_filename and os.path.exists(self.hibernation_filename):
+                os.remove(self.hibernation_filename)
+
+    def handle_events(self, events: List[tcod.event.KeyDown])->None:
+        """Apply a batch of key events, the same way main.main does."""
+        for event in events:
+            if self.finished:
+                return
+            if (
+                isinstance(self.handler, input_handlers.GameOverEventHandler)
+                and event.sym == tcod.event.K_ESCAPE
+            ):
+                # Leave the local savegame alone, the session just ends.
+                self.finished = True
+                return
+            try:
+                next_handler = self.handler.handle_events(event)
+            except SystemExit:
+                self.finished = True
+                return
+            except Exception:
+                traceback.print_exc()
+                if isinstance(self.handler, input_handlers.EventHandler):
+                    self.handler.engine.message_log.add_message(traceback.format_exc(),color.error)
+                continue
+            if next_handler is not self.handler:
+                next_handler.redraw = True
+            self.handler = next_handler
+
+    def render(self)->bytes:
+        """Render the session if anything changed, returning the terminal output to send."""
+        if not self.handler.redraw:
+            return b""
+        start = time.perf_counter()
+        self.console.clear()
+        self.handler.on_render(console = self.console)
+        rendered = time.perf_counter()
+        self.handler.redraw = False
+        frame = self.renderer.encode(self.console)
+        if isinstance(self.handler, input_handlers.EventHandler):
+            # Encoding the frame is this server's equivalent of presenting it.
+            self.handler.engine.timers.add("render", rendered - start)
+            self.handler.engine.timers.add("present", time.perf_counter() - rendered)
+        return frame
+
+class GameServer:
+    """Accept connections and run a Session for each of them."""
+
+    def __init__(
+        self,
+        *,
+        workers: int = 4,
+        idle_timeout: Optional[float] = 300.0,
+        hibernation_dir: Optional[str] = None,
+        restore_target: float = 0.05,
+        stats_every: Optional[float] = 60.0,
+    ):
+        """Sessions without input for idle_timeout seconds are hibernated to
+        hibernation_dir, a new temporary directory by default. Restores slower
+        than restore_target seconds are counted in stats, which are printed
+        every stats_every seconds. None, zero or less turns either off.
+        """
+        self.executor = ThreadPoolExecutor(max_workers = workers)
+        self.sessions: Dict[int, Session] = {}
+        self._session_ids = itertools.count(1)
+        self.idle_timeout = idle_timeout if idle_timeout is not None and idle_timeout > 0 else None
+        self.hibernation_dir = hibernation_dir or tempfile.mkdtemp(prefix = "roguelike-sessions-")
+        self.restore_target = restore_target
+        self.restore_times: Deque[float] = deque(maxlen = 1000)
+        self.slow_restores = 0
+        self.stats_every = stats_every if stats_every is not None and stats_every > 0 else None
+
+    def stats(self)->Dict:
+        """Session counts and restore latency, for monitoring."""
+        restore_ms = sorted(t * 1000 for t in self.restore_times)
+        return {
+            "sessions": len(self.sessions),
+            "hibernating": sum(session.hibernating for session in self.sessions.values()),
+            "restores": len(restore_ms),
+            "restore_ms_median": statistics.median(restore_ms) if restore_ms else None,
+            "restore_ms_p95": restore_ms[int(len(restore_ms) * 0.95)] if restore_ms else None,
+            "restore_ms_max": restore_ms[-1] if restore_ms else None,
+            "slow_restores": self.slow_restores,
+        }
+
+    async def run_in_worker(self, func: Callable, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter)->None:
+        session_id = next(self._session_ids)
+        session = await self.run_in_worker(Session, session_id)
+        self.sessions[session_id] = session
+        writer.write(TELNET_CHARACTER_MODE)
+        # The start of an escape sequence whose end has not arrived yet.
+        pending = b""
+        try:
+            while not session.finished:
+                frame = await self.run_in_worker(self.step, session, [])
+                if frame:
+                    writer.write(frame)
+                    await writer.drain()
+                try:
+                    data = await asyncio.wait_for(reader.read(1024), ESCAPE_TIMEOUT if pending else None)
+                except asyncio.TimeoutError:
+                    # The rest never came: a lone ESC was the Escape key.
+                    data, pending = pending, b""
+                else:
+                    if not data:
+                        break
+                    data, pending = pending + data, b""
+                    start = incomplete_escape_start(data)
+                    if start is not None:
+                        data, pending = data[:start], data[start:]
+                    if not data:
+                        continue
+                # Everything received so far is handled in one step, so bursts of
+                # input cost a single frame. Other sessions run between steps.
+                frame = await self.run_in_worker(self.step, session, parse_input(data))
+                if frame:
+                    writer.write(frame)
+                    await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            del self.sessions[session_id]
+            await self.run_in_worker(session.close)
+            writer.close()
+
+    def step(self, session: Session, events: List[tcod.event.KeyDown])->bytes:
+        """Run in a worker thread: apply input and return the changes to send."""
+        with session.lock:
+            if not events and session.hibernating:
+                return b""
+            if events:
+                session.last_input = time.monotonic()
+            if session.hibernating:
+                seconds = session.wake()
+                self.restore_times.append(seconds)
+                if seconds > self.restore_target:
+                    self.slow_restores += 1
+                print(f"Session {session.session_id} restored in {seconds * 1000:.1f} ms")
+            session.handle_events(events)
+            return session.render()
+
+    def hibernate_if_idle(self, session: Session)->None:
+        """Run in a worker thread: hibernate the session if it is still idle."""
+        with session.lock:
+            idle = time.monotonic() - session.last_input
+            if (
+                session.hibernating
+                or session.finished
+                or self.idle_timeout is None
+                or idle < self.idle_timeout
+                or not isinstance(session.handler, input_handlers.EventHandler)
+                or isinstance(session.handler, input_handlers.GameOverEventHandler)
+            ):
+                return
+            session.hibernate(os.path.join(self.hibernation_dir, f"session-{session.session_id}.sav"))
+
+    async def hibernate_idle_sessions(self)->None:
+        """Periodically hibernate every session that has been idle for too long."""
+        while True:
+            await asyncio.sleep(min(max(self.idle_timeout, 0.1), 10.0))
+            now = time.monotonic()
+            for session in list(self.sessions.values()):
+                if not session.hibernating and now - session.last_input >= self.idle_timeout:
+                    await self.run_in_worker(self.hibernate_if_idle, session)
+
+    async def report_stats(self)->None:
+        """Periodically print stats as a JSON line."""
+        while True:
+            await asyncio.sleep(self.stats_every)
+            print(json.dumps(self.stats()), flush = True)
+
+    async def serve(self, host: str, port: int)->None:
+        server = await asyncio.start_server(self.handle_client, host, port)
+        print(f"Serving on {host}:{port}")
+        if self.idle_timeout is not None:
+            asyncio.create_task(self.hibernate_idle_sessions())
+        if self.stats_every:
+            asyncio.create_task(self.report_stats())
+        async with server:
+            await server.serve_forever()
+
+def main()->None:
+    parser = argparse.ArgumentParser(description = "Host many games over a telnet style protocol.")
+    parser.add_argument("--host", default = "127.0.0.1", help = "Address to listen on.")
+    parser.add_argument("--port", type = int, default = 8023, help = "Port to listen on.")
+    parser.add_argument("--workers", type = int, default = 4, help = "Threads running game steps.")
+    parser.add_argument("--idle-timeout", type = float, default = 300.0, help = "Seconds before an idle session is hibernated, 0 to never hibernate them.")
+    parser.add_argument("--hibernation-dir", default = None, help = "Where hibernated sessions are saved.")
+    parser.add_argument(
+        "--restore-target", type = float, default = 0.05, help = "Restores slower than this many seconds count as slow."
+    )
+    parser.add_argument(
+        "--stats-every", type = float, default = 60.0,
+        help = "Seconds between printing session and restore latency stats, 0 to never print them.",
+    )
+    args = parser.parse_args()
+
+    server = GameServer(
+        workers = args.workers,
+        idle_timeout = args.idle_timeout,
+        hibernation_dir = args.hibernation_dir,
+        restore_target = args.restore_target,
+        stats_every = args.stats_every,
+    )
+    asyncio.run(server.serve(args.host, args.port))
+
+
+if __name__=="__main__":
+    main()
@@ -14,11 +14,17 @@ from engine import Engine
 import entity_factories
 import input_handlers
 from game_map import GameWorld
+from journal import ActionJournal
 
 background_image = tcod.image.load("assets/menu_background.png")[:, :, :3]
 
-def new_game()->Engine:
-    """Return a brand new game session as an Engine instance."""
+def new_game(
+    seed: Optional[int] = None, *, max_messages: int = 1000, message_spill: Optional[str] = None
+)->Engine:
+    """Return a brand new game session as an Engine instance.
+    The same seed always produces the same game; by default a random one is used.
+    max_messages and message_spill are passed on to the engine's message log.
+    """
     map_width = 80
     map_height = 43
 
@@ -28,7 +34,8 @@ def new_game()->Engine:
 
     player = copy.deepcopy(entity_factories.player)
 
-    engine = Engine(player=player)
+    engine = Engine(player=player, seed=seed, max_messages=max_messages, message_spill=message_spill)
+    player.fighter.roll_hp(engine.rng.stream("player"))
 
     engine.game_world = GameWorld(
         engine = engine,
@@ -48,13 +55,11 @@ def new_game()->Engine:
     )
 
     dagger = copy.deepcopy(entity_factories.dagger)
-    dagger.parent = player.inventory
-    player.inventory.items.append(dagger)
+    player.inventory.add(dagger)
     player.equipment.toggle_equip(dagger,add_message = False)
 
     leather_armor = copy.deepcopy(entity_factories.leather_armor)
-    leather_armor.parent = player.inventory
-    player.inventory.items.append(leather_armor)
+    player.inventory.add(leather_armor)
     player.equipment.toggle_equip(leather_armor,add_message = False)
 
     return engine
@@ -69,6 +74,11 @@ def load_game(filename:str)->Engine:
 class MainMenu(input_handlers.BaseEventHandler):
     """Handle the main menu rendering and input."""
 
+    def __init__(self, max_messages: int = 1000, message_spill: Optional[str] = None):
+        # Message log settings for new games.
+        self.max_messages = max_messages
+        self.message_spill = message_spill
+
     def on_render(self, console: tcod.Console)->None:
          """Render the main menu on a background image."""
          console.draw_semigraphics(background_image,0,0)
@@ -104,6 +114,8 @@ class MainMenu(input_handlers.BaseEventHandler):
                 return input_handlers.PopupMessage(self, f"Failed to load save:\n{exc}")
 
         elif key == tcod.event.K_n:
-            return input_handlers.MainGameEventHandler(new_game())
+            engine = new_game(max_messages = self.max_messages, message_spill = self.message_spill)
+            engine.journal = ActionJournal("savegame.journal", engine.rng.seed)
+            return input_handlers.MainGameEventHandler(engine)
 
         return None
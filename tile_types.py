@@ -1,4 +1,4 @@
-from typing import Tuple
+from typing import Tuple, Union
 import numpy as np
 
 # Tile graphics structured type compatible with Console.tiles_rgb.
@@ -20,15 +20,51 @@ tile_dt = np.dtype(
     ]
 )
 
+# Registry of every defined tile, indexed by tile id. Maps only store the ids.
+tile_table = np.zeros(0, dtype = tile_dt)
+
 def new_tile(
     *,
     walkable: int,
     transparent: int,
     dark: Tuple[int,Tuple[int,int,int],Tuple[int,int,int]],
     light: Tuple[int,Tuple[int,int,int],Tuple[int,int,int]]
-)-> np.ndarray:
-    # Helper function for defining individual tile types
-    return np.array((walkable, transparent,dark,light),dtype = tile_dt)
+)-> int:
+    """Register a tile type and return its id in the tile registry."""
+    global tile_table
+    tile = np.array((walkable, transparent,dark,light),dtype = tile_dt)
+    tile_table = np.append(tile_table, tile)
+    assert len(tile_table) <= np.iinfo(np.uint8).max + 1, "Too many tile types for uint8 ids."
+    return len(tile_table) - 1
+
+class TileGrid:
+    """A grid of tile ids, one byte per cell.
+
+    Indexing with a property name such as "walkable" looks that property up
+    for every cell in the registry. Any other index reads or writes tile ids.
+    `version` is bumped on every write so callers can cache derived data.
+    """
+
+    def __init__(self, width: int, height: int, fill_value: int):
+        self.ids = np.full((width,height), fill_value = fill_value, dtype = np.uint8, order = "F")
+        self.version = 0
+
+    @property
+    def shape(self)->Tuple[int,int]:
+        return self.ids.shape
+
+    def __getitem__(self, key: Union[str, int, slice, tuple])->np.ndarray:
+        if isinstance(key, str):
+            return tile_table[key][self.ids]
+        return self.ids[key]
+
+    def __setitem__(self, key: Union[int, slice, tuple], value: int)->None:
+        self.ids[key] = value
+        self.version += 1
+
+    def lookup(self, name: str, x: int, y: int):
+        """Return a single property of the tile at x, y."""
+        return tile_table[name][self.ids[x,y]]
 
 
 SHROUD = np.array((ord(" "),(255,255,255),(0,0,0)),dtype = graphic_dt)
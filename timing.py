@@ -0,0 +1,126 @@
+"""Always-on timers and counters for the phases of a turn, and an optional profiler.
+
+Timings are kept in rolling windows, so when someone reports lag the
+engine can say which phase was slow without a profiler attached.
+"""
+from __future__ import annotations
+
+import bisect
+from collections import Counter, deque
+import contextlib
+import cProfile
+import os
+import pstats
+from typing import Deque, Dict, Iterator, List, Optional
+
+# The phases timed on every turn and frame, in the order they happen.
+PHASES = ("action", "enemies", "fov", "render", "present")
+
+# Upper edges of the histogram buckets, in milliseconds. The last bucket has no upper edge.
+BUCKET_EDGES_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250)
+
+class PhaseTimer:
+    """The most recent durations of one phase."""
+
+    def __init__(self, window: int = 1000):
+        self.samples: Deque[float] = deque(maxlen = window)
+        self.count = 0 # Every sample ever added, including those out of the window.
+
+    def add(self, seconds: float)->None:
+        self.samples.append(seconds)
+        self.count += 1
+
+    @property
+    def last(self)->float:
+        return self.samples[-1] if self.samples else 0.0
+
+    def percentile(self, fraction: float)->float:
+        """Duration in seconds that fraction of the windowed samples are within."""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+    def histogram(self)->List[int]:
+        """Counts of windowed samples per bucket of BUCKET_EDGES_MS."""
+        counts = [0] * (len(BUCKET_EDGES_MS) + 1)
+        for seconds in self.samples:
+            counts[bisect.bisect_left(BUCKET_EDGES_MS, seconds * 1000)] += 1
+        return counts
+
+class TurnTimers:
+    """A PhaseTimer for each of PHASES. Timings are not saved with the game."""
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self.phases: Dict[str, PhaseTimer] = {phase: PhaseTimer(window) for phase in PHASES}
+
+    def __getstate__(self)->Dict:
+        return {"window": self.window}
+
+    def __setstate__(self, state: Dict)->None:
+        self.__init__(state["window"])
+
+    def __getitem__(self, phase: str)->PhaseTimer:
+        return self.phases[phase]
+
+    def add(self, phase: str, seconds: float)->None:
+        self.phases[phase].add(seconds)
+
+    def report(self)->str:
+        """A table of percentiles and histograms, one line per phase."""
+        buckets = " ".join(f"<{edge:g}" for edge in BUCKET_EDGES_MS) + " more"
+        lines = [f"{'phase':8} {'count':>7} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}  {buckets}"]
+        for phase, timer in self.phases.items():
+            lines.append(
+                f"{phase:8} {timer.count:7} {timer.percentile(0.5) * 1000:8.3f} "
+                f"{timer.percentile(0.95) * 1000:8.3f} {timer.percentile(1.0) * 1000:8.3f}  "
+                + " ".join(str(count) for count in timer.histogram())
+            )
+        return "\n".join(lines)
+
+class TurnCounters:
+    """How often expensive operations happened in the turn being played,
+    and in the last complete turn.
+    """
+
+    def __init__(self)->None:
+        self.current: Counter = Counter()
+        self.last_turn: Counter = Counter()
+
+    def count(self, name: str)->None:
+        self.current[name] += 1
+
+    def end_turn(self)->None:
+        self.last_turn, self.current = self.current, Counter()
+
+def process_memory(pid: Optional[int] = None)->Optional[int]:
+    """Resident set size of a process, this one by default, in bytes.
+    None if the platform does not expose it.
+    """
+    try:
+        with open(f"/proc/{pid or os.getpid()}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+@contextlib.contextmanager
+def profiled(filename: Optional[str], top: int = 30)->Iterator[None]:
+    """Run the body under cProfile if filename is set, then write the stats
+    there and print the calls with the most cumulative time.
+    """
+    if not filename:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(filename)
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(top)
+        print(f"Profile written to {filename}")